@@ -9,6 +9,10 @@ LLM (GPT-5 via Responses API):
   - Actions   : extract monthly action magnitudes + oppCost; MUST estimate (never all zeros).
   - Kin/Affil : detect {Affiliation: 0..1} and {Kinships: 3..10} using Appadurai “scapes”.
                 Uses only known culture names; never invents. Parent must be higher scope (at least one tier above the child).
+  Names, Scopes, Actions and atmosphere traits share ONE request per batch (LLMCombinedExtractor);
+  Kin/Affil runs afterwards because it needs the full list of normalized names.
+  Replies are cached per row under .llm_cache/ (sha256 of model, prompt, shared payload and row), so reruns
+  only query new or changed rows; --no-cache bypasses it.
 
 Action schema (monthly):
   hours_direct, hours_organizing, dollars_donated, advocacy_outputs,
@@ -31,14 +35,36 @@ Usage:
 """
 from __future__ import annotations
 
-import argparse, hashlib, json, math, os, re, sys, time
+import argparse, asyncio, hashlib, json, math, os, random, re, sys, time
+from collections import Counter
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
+try:
+    import orjson  # type: ignore   # optional: faster (de)serialization of LLM payloads and replies
+except Exception:
+    orjson = None
+try:
+    import tiktoken  # type: ignore   # optional: exact prompt token counts for batch sizing
+except Exception:
+    tiktoken = None
+try:
+    import ahocorasick  # type: ignore   # optional: single-pass known-name mention scan
+except Exception:
+    ahocorasick = None
+try:
+    import numba  # type: ignore   # optional: parallel energy kernel for large inputs
+except Exception:
+    numba = None
+
 # ------------------------------- Logging -----------------------------------
+KINAFF_DEBUG = os.environ.get("KINAFF_DEBUG") == "1"   # per-row [affil] accept/reject reasons
+
 def log(msg: str) -> None:
     print(msg, file=sys.stdout, flush=True)
 
@@ -83,6 +109,7 @@ SCOPE_MAP_4 = {
     "city":"local","local":"local","neighborhood":"local","community":"local","family":"local","household":"local",
 }
 SCOPE_LEVEL = {"local": 0, "regional": 1, "national": 2, "global": 3}
+SCOPES = ("global", "national", "regional", "local")   # rebalance tie-break order
 
 NEGATION_TOKENS = [
     "no ", " none", " not ", "never", "did not", "didn't", "does not", "doesn't",
@@ -90,67 +117,116 @@ NEGATION_TOKENS = [
 ]
 
 # ------------------------------ Small utils --------------------------------
+_BRACKET_RE      = re.compile(r"\[[^\]]*\]")          # [AI Submission]-style tags
+_NONWORD_RE      = re.compile(r"[^\w\s]")
+_WS_RE           = re.compile(r"\s+")
+_LIST_SPLIT_RE   = re.compile(r"[;,]")
+_PARENT_SPLIT_RE = re.compile(r"\s*(?:[,;/]| and )\s*")
+
 def stable_hash_int(s: str) -> int:
-    return int(hashlib.md5((s or "").encode("utf-8")).hexdigest(), 16)
+    """Deterministic 64-bit hash (8-byte blake2b digest read as a big-endian unsigned int)."""
+    return int.from_bytes(hashlib.blake2b((s or "").encode("utf-8"), digest_size=8).digest(), "big")
 
 def clean_culture_name_rule_based(s: str) -> str:
     if not isinstance(s,str): return ""
-    s = re.sub(r"\[[^\]]*\]"," ",s)
-    s = re.sub(r"[^\w\s]"," ",s.strip().lower())
-    tokens = [t for t in re.split(r"\s+", s) if t and t not in STOP_WORDS][:3]
+    s = _BRACKET_RE.sub(" ",s)
+    s = _NONWORD_RE.sub(" ",s.strip().lower())
+    tokens = [t for t in _WS_RE.split(s) if t and t not in STOP_WORDS][:3]
     return " ".join(w.capitalize() for w in tokens)
 
-def normalize_list_field(s: str, *, clean_names: bool=False) -> str:
-    if not isinstance(s,str): return ""
-    parts = [p.strip() for p in re.split(r"[;,]", s) if p.strip()]
-    if clean_names:
-        parts = [clean_culture_name_rule_based(p) for p in parts if p]
-    out, seen = [], set()
-    for p in parts:
-        if p and p not in seen:
-            out.append(p); seen.add(p)
-    return ", ".join(out)
-
 def split_list_field(s: str) -> List[str]:
     if not isinstance(s,str) or not s.strip(): return []
-    return [p.strip() for p in re.split(r"[;,]", s) if p.strip()]
-
-def parse_int_1_10(x, default=5) -> int:
-    try:
-        v = int(float(x));  return v if 1 <= v <= 10 else default
-    except Exception:
-        return default
-
-def normalize_scope_rule_based_4(s: str) -> str:
-    if not isinstance(s,str): return "local"
-    s_low = s.strip().lower()
-    for k,v in SCOPE_MAP_4.items():
-        if re.search(rf"\b{k}\b", s_low): return v
+    return [p.strip() for p in _LIST_SPLIT_RE.split(s) if p.strip()]
+
+def parse_int_1_10_series(s: pd.Series, default: int = 5) -> pd.Series:
+    """1..10 ratings for a whole column: truncate toward zero, anything unparsable or outside 1..10 -> default."""
+    v = np.trunc(pd.to_numeric(s, errors="coerce").astype("float64"))
+    return v.where(v.between(1, 10)).fillna(default).astype("int8")
+
+@dataclass(frozen=True)
+class RowText:
+    """An evidence string with its lower-cased form and scope-cache key, built once per row."""
+    raw: str
+    low: str
+    norm_key: str
+
+    @classmethod
+    def of(cls, text: Optional[str]) -> "RowText":
+        raw = text if isinstance(text, str) else ""
+        low = raw.lower()
+        key = _NONWORD_RE.sub(" ", _BRACKET_RE.sub(" ", low))
+        return cls(raw, low, _WS_RE.sub(" ", key).strip())
+
+_SCOPE_MAP_RES = [(re.compile(rf"\b{k}\b"), v) for k, v in SCOPE_MAP_4.items()]
+
+def normalize_scope_rule_based_4(s: str | RowText) -> str:
+    if isinstance(s, RowText): s_low = s.low
+    elif not isinstance(s,str): return "local"
+    else: s_low = s.strip().lower()
+    for pat, v in _SCOPE_MAP_RES:
+        if pat.search(s_low): return v
     if "global" in s_low or "inter" in s_low or "world" in s_low: return "global"
     if "nation" in s_low or "country" in s_low or "national" in s_low: return "national"
     if "region" in s_low or "state" in s_low or "province" in s_low or "district" in s_low: return "regional"
     return "local"
 
-def pick_series(df: pd.DataFrame, key: str, override_header: Optional[str]) -> pd.Series:
-    if override_header:
-        for col in df.columns:
-            if str(col).strip().lower() == override_header.strip().lower():
-                return df[col]
-    for alias in ALIASES[key]:
-        for col in df.columns:
-            if str(col).strip().lower() == alias:
-                return df[col]
+# Column-wide versions of the two rule-based normalizers (same results, regex kernels instead of per-cell calls).
+_SCOPE_WORD_RES = [r"\b(?:" + "|".join(re.escape(k) for k, v in SCOPE_MAP_4.items() if v == tier) + r")\b"
+                   for tier in SCOPES]          # SCOPE_MAP_4 lists its keys tier by tier
+_SCOPE_SUBSTR_RES = [("global", r"global|inter|world"), ("national", r"nation|country"),
+                     ("regional", r"region|state|province|district")]
+
+def _str_cells(s: pd.Series) -> pd.Series:
+    """Object-dtype copy with non-strings as "": keeps .str on Python `re` (Arrow string dtypes use ASCII-only RE2 \\w/\\b)."""
+    return pd.Series([x if isinstance(x, str) else "" for x in s], index=s.index, dtype=object)
+
+def normalize_scope_series(s: pd.Series) -> pd.Series:
+    low = _str_cells(s).str.lower()
+    masks = [low.str.contains(p, regex=True) for p in _SCOPE_WORD_RES]
+    masks += [low.str.contains(p, regex=True) for _, p in _SCOPE_SUBSTR_RES]
+    choices = list(SCOPES) + [sc for sc, _ in _SCOPE_SUBSTR_RES]
+    return pd.Series(np.select(masks, choices, default="local"), index=s.index)
+
+def clean_culture_name_series(s: pd.Series) -> pd.Series:
+    txt = _str_cells(s)
+    toks = (txt.str.replace(r"\[[^\]]*\]", " ", regex=True).str.strip().str.lower()
+               .str.replace(r"[^\w\s]", " ", regex=True).str.split())
+    return toks.map(lambda ts: " ".join(t.capitalize() for t in [t for t in ts if t not in STOP_WORDS][:3]))
+
+def _list_parts_series(s: pd.Series) -> pd.Series:
+    """Exploded, stripped, non-empty `[;,]` parts; the index is the row position each part came from."""
+    txt = _str_cells(s).reset_index(drop=True)
+    parts = txt.str.split(r"[;,]", regex=True).explode().str.strip()
+    return parts[parts.fillna("") != ""]
+
+def split_list_field_series(s: pd.Series) -> pd.Series:
+    """Column form of split_list_field: one list of stripped parts per row."""
+    parts = _list_parts_series(s)
+    out = parts.groupby(level=0, sort=False).agg(list).reindex(range(len(s)))
+    return pd.Series([x if isinstance(x, list) else [] for x in out], index=s.index, dtype=object)
+
+def column_map(df: pd.DataFrame) -> Dict[str, int]:
+    """{stripped lower-cased header: position}, first column wins; built once and shared by every pick_series call."""
+    col_map: Dict[str, int] = {}
+    for pos, col in enumerate(df.columns): col_map.setdefault(str(col).strip().lower(), pos)
+    return col_map
+
+def pick_series(df: pd.DataFrame, key: str, override_header: Optional[str],
+                col_map: Optional[Dict[str, int]] = None) -> pd.Series:
+    if col_map is None: col_map = column_map(df)
+    labels = ([override_header.strip().lower()] if override_header else []) + ALIASES[key]
+    pos = next((col_map[lab] for lab in labels if lab in col_map), None)
+    if pos is not None: return df.iloc[:, pos]
     idx = POSITIONAL_FALLBACK[key]
     return df.iloc[:, idx] if idx < len(df.columns) else pd.Series([""]*len(df), index=df.index)
 
 # ---- OKLCH color utilities (deterministic + perceptual) --------------------
-def oklch_to_oklab(L: float, C: float, h_deg: float) -> Tuple[float, float, float]:
-    h = math.radians(h_deg % 360.0)
-    a = C * math.cos(h)
-    b = C * math.sin(h)
-    return (L, a, b)
+# Element-wise on NumPy arrays (scalars work too), so a whole palette converts in one pass.
+def oklch_to_oklab(L, C, h_deg) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    h = np.deg2rad(np.mod(h_deg, 360.0))
+    return (np.asarray(L, dtype=float), C * np.cos(h), C * np.sin(h))
 
-def oklab_to_linear_srgb(L: float, a: float, b: float) -> Tuple[float, float, float]:
+def oklab_to_linear_srgb(L, a, b) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     l_ = L + 0.3963377774 * a + 0.2158037573 * b
     m_ = L - 0.1055613458 * a - 0.0638541728 * b
     s_ = L - 0.0894841775 * a - 1.2914855480 * b
@@ -162,90 +238,272 @@ def oklab_to_linear_srgb(L: float, a: float, b: float) -> Tuple[float, float, fl
     b = -0.0041960863 * l - 0.7034186147 * m + 1.7076147010 * s
     return (r, g, b)
 
-def linear_to_srgb(c: float) -> float:
-    if c <= 0.0031308:
-        return 12.92 * c
-    return 1.055 * (c ** (1/2.4)) - 0.055
+def linear_to_srgb(c) -> np.ndarray:
+    c = np.asarray(c, dtype=float)
+    return np.where(c <= 0.0031308, 12.92 * c, 1.055 * np.maximum(c, 0.0031308) ** (1/2.4) - 0.055)
 
-def srgb_to_hex(r: float, g: float, b: float) -> str:
-    R = int(max(0, min(1, linear_to_srgb(r))) * 255 + 0.5)
-    G = int(max(0, min(1, linear_to_srgb(g))) * 255 + 0.5)
-    B = int(max(0, min(1, linear_to_srgb(b))) * 255 + 0.5)
-    return f"#{R:02X}{G:02X}{B:02X}"
+def srgb_to_hex(r, g, b):
+    """Hex string per element; a plain str for scalar input."""
+    R, G, B = ((np.clip(linear_to_srgb(x), 0.0, 1.0) * 255 + 0.5).astype(np.uint32) for x in (r, g, b))
+    out = np.char.mod("#%06X", (R << 16) | (G << 8) | B)
+    return str(out) if out.ndim == 0 else out
 
-def oklch_to_hex(L: float, C: float, h_deg: float) -> Tuple[str, Tuple[float, float, float]]:
-    L = max(0.0, min(1.0, L))
-    C = max(0.0, max(0.0, C))
+def oklch_to_hex_array(L, C, h_deg) -> Tuple[np.ndarray, np.ndarray]:
+    """Hex strings (n,) and OKLab coordinates (n, 3) for arrays of OKLCH components."""
+    L = np.clip(np.asarray(L, dtype=float), 0.0, 1.0)
+    C = np.maximum(np.asarray(C, dtype=float), 0.0)
     L_, a_, b_ = oklch_to_oklab(L, C, h_deg)
     r, g, b = oklab_to_linear_srgb(L_, a_, b_)
-    return srgb_to_hex(r, g, b), (L_, a_, b_)
+    return np.atleast_1d(srgb_to_hex(r, g, b)), np.stack([L_, a_, b_], axis=-1).reshape(-1, 3)
 
-def oklab_deltaE(p: Tuple[float, float, float], q: Tuple[float, float, float]) -> float:
-    return ((p[0]-q[0])**2 + (p[1]-q[1])**2 + (p[2]-q[2])**2) ** 0.5
+def oklch_to_hex(L: float, C: float, h_deg: float) -> Tuple[str, Tuple[float, float, float]]:
+    hexes, labs = oklch_to_hex_array(L, C, h_deg)
+    return str(hexes[0]), tuple(float(v) for v in labs[0])
 
 # ---- Traits → Color (radically distinct via anchors) -----------------------
 ANCHOR_HUES = [0, 30, 60, 90, 120, 150, 180, 210, 240, 270, 300, 330]  # 12-way, full wheel
 ANCHOR_LIGHTNESS = [0.72, 0.60, 0.82, 0.52]  # alternate to increase separation
 
+def _too_close_pairs(labs: np.ndarray, deltaE_min: float) -> np.ndarray:
+    """(i, j) index pairs, i < j, whose OKLab distance is below deltaE_min (all pairs at once)."""
+    sq = np.einsum("ij,ij->i", labs, labs)
+    D2 = sq[:, None] + sq[None, :] - 2.0 * (labs @ labs.T)   # |p-q|² without an n×n×3 temporary
+    deltaE_min_sq = deltaE_min * deltaE_min                   # squared compare: no sqrt over the n×n matrix
+    return np.argwhere(np.triu(D2 < deltaE_min_sq, k=1))
+
 def assign_colors_divergent(names: List[str],
                             traits: List[Tuple[float, float, float]],
                             deltaE_min: float = 0.22,
                             max_iter: int = 8) -> List[str]:
     assert len(names) == len(traits)
     n = len(names)
-    idx = [stable_hash_int(nm) % len(ANCHOR_HUES) for nm in names]
-    colors_hex, labs, params = [], [], []
-    for i, (nm, (w, e, f)) in enumerate(zip(names, traits)):
-        anchor_h = float(ANCHOR_HUES[idx[i]])
-        h = (anchor_h + (w - 0.5) * 16.0) % 360.0
-        C = 0.18 + min(0.06, max(0.0, e) * 0.06)     # 0.18–0.24
-        Lbase = ANCHOR_LIGHTNESS[i % len(ANCHOR_LIGHTNESS)]
-        L = max(0.40, min(0.88, Lbase - 0.10 * (f - 0.5)))
-        hex_, lab = oklch_to_hex(L, C, h)
-        colors_hex.append(hex_); labs.append(lab); params.append((L, C, h))
+    hashes = np.fromiter((stable_hash_int(nm) for nm in names), dtype=np.uint64, count=n)   # each name hashed once
+    idx = (hashes % np.uint64(len(ANCHOR_HUES))).astype(np.int64)
+    jitter = ((hashes % np.uint64(9)).astype(np.int64) + 2) * 0.18   # 0.36..1.80 of GA
+    tr = np.asarray(traits, dtype=float).reshape(n, 3)
+    w, e, f = tr[:, 0], tr[:, 1], tr[:, 2]
+    h = np.mod(np.asarray(ANCHOR_HUES, dtype=float)[idx] + (w - 0.5) * 16.0, 360.0)
+    C = 0.18 + np.minimum(0.06, np.maximum(0.0, e) * 0.06)     # 0.18–0.24
+    Lbase = np.asarray(ANCHOR_LIGHTNESS)[np.arange(n) % len(ANCHOR_LIGHTNESS)]
+    L = np.clip(Lbase - 0.10 * (f - 0.5), 0.40, 0.88)
+    colors_hex, labs = oklch_to_hex_array(L, C, h)
     GA = 137.50776405003785
     for _ in range(max_iter):
-        changed = False
-        for i in range(n):
-            for j in range(i+1, n):
-                if oklab_deltaE(labs[i], labs[j]) < deltaE_min:
-                    loser = i if traits[i][1] <= traits[j][1] else j
-                    L0, C0, h0 = params[loser]
-                    jitter_steps = ((stable_hash_int(names[loser]) % 9) + 2) * 0.18  # 0.36..1.80 of GA
-                    h1 = (h0 + GA * jitter_steps) % 360.0
-                    hex1, lab1 = oklch_to_hex(L0, C0, h1)
-                    params[loser] = (L0, C0, h1)
-                    colors_hex[loser] = hex1
-                    labs[loser] = lab1
-                    changed = True
-        if not changed:
+        pairs = _too_close_pairs(labs, deltaE_min)
+        if not len(pairs):
             break
-    for i in range(n):
-        for j in range(i+1, n):
-            if oklab_deltaE(labs[i], labs[j]) < deltaE_min:
-                L0, C0, h0 = params[j]
-                C1 = min(0.28, C0 + 0.03)
-                hex1, lab1 = oklch_to_hex(L0, C1, h0)
-                params[j] = (L0, C1, h0)
-                colors_hex[j] = hex1
-                labs[j] = lab1
-    return colors_hex
+        # per clashing pair the lower-energy color moves; each loser rotates once per pass
+        losers = np.unique(np.where(e[pairs[:, 0]] <= e[pairs[:, 1]], pairs[:, 0], pairs[:, 1]))
+        h[losers] = np.mod(h[losers] + GA * jitter[losers], 360.0)
+        colors_hex[losers], labs[losers] = oklch_to_hex_array(L[losers], C[losers], h[losers])
+    js = np.unique(_too_close_pairs(labs, deltaE_min)[:, 1])
+    if len(js):
+        C[js] = np.minimum(0.28, C[js] + 0.03)
+        colors_hex[js], labs[js] = oklch_to_hex_array(L[js], C[js], h[js])
+    return colors_hex.tolist()
+
+# ------------------------------ LLM disk cache -----------------------------
+# One JSON file per (model, system prompt, shared payload, row) so reruns only pay for new/changed rows.
+LLM_CACHE_DIR = Path(".llm_cache")
+
+def _canon(obj) -> bytes:
+    # keys hash stdlib JSON, so they are identical whether or not orjson is installed
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8")
+
+def _cache_keys(model: str, system: str, shared: dict, rows: list) -> List[str]:
+    """One key per row; the (often large) shared payload is serialized and hashed once, not once per row."""
+    head = hashlib.sha256(_canon([model, system, shared]))
+    keys = []
+    for r in rows:
+        h = head.copy(); h.update(_canon(r)); keys.append(h.hexdigest())
+    return keys
+
+def _cache_path(key: str) -> Path:
+    return LLM_CACHE_DIR / key[:2] / f"{key}.json"
+
+@lru_cache(maxsize=None)
+def _warn_once(msg: str) -> None:
+    log(msg)
+
+def _cache_get(key: str) -> Optional[dict]:
+    """Cached item, or None on a miss; unreadable or corrupt entries count as misses."""
+    try:
+        with open(_cache_path(key), "rb") as f:
+            return _json_loads(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        _warn_once(f"      ⚠️ LLM cache read failed under {LLM_CACHE_DIR}/ ({e.__class__.__name__}); treating entries as misses")
+        return None
+
+def _cache_put(key: str, value) -> None:
+    """Best effort: a cache that can't be written is logged once and the run continues uncached."""
+    path = _cache_path(key)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(_json_dumps(value).encode("utf-8"))
+        os.replace(tmp, path)   # atomic: readers never see a half-written entry
+    except OSError as e:
+        _warn_once(f"      ⚠️ LLM cache write failed under {LLM_CACHE_DIR}/ ({e.__class__.__name__}); continuing without caching")
+        try: tmp.unlink()
+        except OSError: pass
+
+def _json_dumps(obj) -> str:
+    return orjson.dumps(obj).decode("utf-8") if orjson is not None else json.dumps(obj, ensure_ascii=False)
+
+def _json_loads(text: str | bytes):
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+def _json_list(text: str, key: str) -> Optional[list]:
+    try:
+        arr = _json_loads(text).get(key, [])
+        return arr if isinstance(arr, list) else None
+    except Exception:
+        return None
+
+def _as_float(x, default: Optional[float]) -> Optional[float]:
+    """float(x) for an LLM-supplied value; `default` when it is null, non-numeric ("3h") or not finite."""
+    try:
+        v = float(x)
+    except (TypeError, ValueError):
+        return default
+    return v if math.isfinite(v) else default
+
+def _nums_ok(d, keys, default: float) -> bool:
+    """`d` is a dict (or missing) whose `keys` all hold usable numbers, as the stages' finalize reads them."""
+    if d is None: return True
+    return isinstance(d, dict) and all(_as_float(d.get(k, default) or default, None) is not None for k in keys)
 
 # ---------------------------- LLM base wiring ------------------------------
 @dataclass
 class LLMBaseConfig:
     model: str = "gpt-5"
-    batch_size: int = 8          # conservative to avoid overflow
+    combined_bs: int = 16        # rows per combined request (names/scopes/actions/atmosphere; long multi-field rows)
+    scopes_bs: int = 64          # rows per scope-only request (short evidence strings)
+    kinaff_bs: int = 16          # rows per kin/affil request (every request also carries known_cultures[:300])
+    max_prompt_tokens: int = 16000   # stages shrink their batch so instructions + shared payload + rows fit
+    max_concurrency: int = 16    # requests in flight at once across all batches (keep under your RPM limit)
+    request_timeout: float = 120.0   # seconds per attempt (gpt-5 reasoning replies are slow; a stall past this is retried)
+    kinaff_timeout: float = 180.0    # kin/affil prompts also carry known_cultures, so they get a longer budget
+    request_retries: int = 2         # extra attempts after a timeout, 429 or 5xx, with 0.5·2^i s backoff
+    use_cache: bool = True           # read/write the per-row reply cache under LLM_CACHE_DIR
+
+@lru_cache(maxsize=1)
+def _tokenizer():
+    try:    return tiktoken.get_encoding("o200k_base") if tiktoken is not None else None
+    except Exception: return None   # encoding files unavailable (offline)
+
+def count_tokens(text: str) -> int:
+    enc = _tokenizer()
+    return len(enc.encode(text)) if enc is not None else len(text) // 4 + 1   # ~4 chars/token without tiktoken
+
+def cap_batch_size(bs: int, fixed: str, row_payloads: Iterable[str], max_tokens: int) -> int:
+    """Largest batch ≤ bs whose prompt stays under max_tokens even if every row is as long as the longest one."""
+    per_row = max(map(count_tokens, row_payloads), default=0)
+    if not per_row: return bs
+    return max(1, min(bs, int((max_tokens - count_tokens(fixed)) // per_row)))
+
+def _is_openai_api_error(err: Exception) -> bool:
+    name = err.__class__.__name__
+    return name in {"APIError","APIStatusError","RateLimitError","APITimeoutError","APIConnectionError",
+                    "BadRequestError","AuthenticationError","InternalServerError","TimeoutError"}
+
+def _is_transient(err: BaseException) -> bool:
+    """Worth retrying: our own wait_for timeout, a dropped connection, 429, or a 5xx."""
+    if isinstance(err, asyncio.TimeoutError): return True
+    if err.__class__.__name__ in {"APITimeoutError","APIConnectionError","RateLimitError","InternalServerError"}: return True
+    return (getattr(err, "status_code", None) or 0) >= 500
+
+async def hedged_retry(call: Callable[[], Awaitable], ok: Callable[[object], bool], *,
+                       attempts: int = 3, base: float = 0.5, cap: float = 8.0, label: str = "LLM"):
+    """
+    Await call(); while the result fails ok(), reissue with jittered exponential backoff (base·2^k, ≤ cap).
+    A retry still in flight when the next backoff elapses is hedged by a concurrent reissue; the first usable
+    reply wins and the rest are cancelled. A retry that raises just uses up its attempt; returns the last
+    non-failing result if none is usable. Exceptions from the first call propagate.
+    """
+    res = await call()
+    if ok(res) or attempts <= 1: return res
+    log(f"      ⚠️ {label} reply unusable; retrying (≤{attempts - 1} more, hedged)…")
+    backoff = lambda k: min(cap, base * 2 ** (k - 1)) * random.uniform(0.5, 1.0)
+    started, pending = 1, set()
+    try:
+        while started < attempts or pending:
+            if not pending:   # nothing in flight: back off, then reissue
+                await asyncio.sleep(backoff(started))
+                pending.add(asyncio.ensure_future(call())); started += 1
+            hedge = backoff(started) if started < attempts else None
+            done, pending = await asyncio.wait(pending, timeout=hedge, return_when=asyncio.FIRST_COMPLETED)
+            if not done:      # retry still running after the next backoff: race a second one
+                pending.add(asyncio.ensure_future(call())); started += 1
+                continue
+            for t in done:
+                if t.exception() is not None: continue   # a failed retry doesn't end the race; siblings keep going
+                r = t.result()
+                if ok(r): return r
+                res = r
+        return res
+    finally:
+        for t in pending: t.cancel()
 
 class _OpenAIHandle:
-    def __init__(self):
+    def __init__(self, max_concurrency: int = 16, timeout: float = 120.0, retries: int = 2, use_cache: bool = True):
         key = os.getenv("OPENAI_API_KEY")
         if not key: raise RuntimeError("Set OPENAI_API_KEY.")
         try:
-            from openai import OpenAI  # type: ignore
+            from openai import AsyncOpenAI  # type: ignore
         except Exception as e:
             raise RuntimeError("Install openai>=1.0: pip install openai") from e
-        self.client = OpenAI()
+        self.aclient = AsyncOpenAI(max_retries=0)          # create_with_retry owns retries and timeouts
+        self._sem = asyncio.Semaphore(max_concurrency)   # cap in-flight requests (RPM/QPM limits)
+        self.timeout, self.retries, self.use_cache = timeout, retries, use_cache
+
+    async def create(self, timeout: Optional[float] = None, **kwargs):
+        """One request under the concurrency cap; `timeout` bounds the request itself, not the wait for a slot."""
+        async with self._sem:
+            return await asyncio.wait_for(self.aclient.responses.create(**kwargs), timeout)
+
+    async def create_with_retry(self, req: dict, timeout: Optional[float] = None, retries: Optional[int] = None):
+        """create(**req) bounded by `timeout` per attempt; timeouts, 429s and 5xx are retried after 0.5·2^i s."""
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        for i in range(retries + 1):
+            try:
+                return await self.create(timeout, **req)
+            except Exception as e:
+                if i == retries or not _is_transient(e): raise
+                log(f"      ⚠️ LLM {e.__class__.__name__}: {str(e) or 'timed out'}; retry {i + 1}/{retries}…")
+                await asyncio.sleep(0.5 * 2 ** i)
+
+    async def request_items(self, model: str, system: str, shared: dict, rows: list, *,
+                            parse: Callable[[str], Optional[list]], rows_key: str = "input",
+                            pad: bool = False, timeout: Optional[float] = None,
+                            valid: Callable[[object], bool] = lambda it: True) -> Optional[list]:
+        """
+        One request for `rows`, answering each row from the disk cache where possible and sending only the misses.
+        `shared` is the rest of the user payload (few-shots, schema, known names); `parse` maps the reply text to
+        one item per sent row, or None. With pad=True a short reply is padded with None instead of rejected.
+        `timeout` overrides the handle's per-attempt budget for heavier stages. Only items passing the stage's
+        `valid` check are cached (and cached items failing it are re-asked), so one malformed reply is never replayed.
+        Returns items aligned with `rows`, or None when the reply is unusable.
+        """
+        keys = _cache_keys(model, system, shared, rows) if self.use_cache else [None] * len(rows)
+        items = [_cache_get(k) if k else None for k in keys]
+        items = [it if it is not None and valid(it) else None for it in items]
+        miss = [i for i, it in enumerate(items) if it is None]
+        if not miss: return items
+        user = {"role":"user","content": _json_dumps({**shared, rows_key: [rows[i] for i in miss]})}
+        resp = await self.create_with_retry({"model": model, "input": [{"role":"system","content":system}, user],
+                                             "text": {"verbosity":"low"}}, timeout=timeout)
+        got = parse(self.parse_text(resp))
+        if got is not None and pad: got = (got + [None] * len(miss))[:len(miss)]
+        if got is None or len(got) != len(miss): return None
+        for i, it in zip(miss, got):
+            items[i] = it
+            if keys[i] and it and isinstance(it, (dict, str)) and valid(it): _cache_put(keys[i], it)
+        return items
 
     @staticmethod
     def parse_text(resp) -> str:
@@ -270,31 +528,41 @@ class LLMNames:
 
     @staticmethod
     def _preclean(s: str) -> str:
-        s = re.sub(r"\[[^\]]*\]"," ",s or "")
-        return re.sub(r"\s+"," ",s).strip()
+        s = _BRACKET_RE.sub(" ",s or "")
+        return _WS_RE.sub(" ",s).strip()
 
-    def normalize(self, raw: List[str]) -> List[str]:
+    async def normalize(self, raw: List[str]) -> List[str]:
         if not raw: return []
         pre = [self._preclean(x) for x in raw]
-        system = {"role":"system","content":
-            "Normalize culture names. For each input, return a Title Cased name of 1–3 words. "
-            "Strip bracketed tags like [AI Submission]. Return ONLY JSON: {\"names\": [..]} matching input length."}
-        user = {"role":"user","content": json.dumps({"input": pre}, ensure_ascii=False)}
-        resp = self.h.client.responses.create(model=self.cfg.model, input=[system, user],
-                                              text={"verbosity":"low"})
-        text = self.h.parse_text(resp)
-        try:
-            out = json.loads(text).get("names", [])
-        except Exception as e:
-            raise RuntimeError(f"Name JSON parse failed: {text[:300]}") from e
-        out2=[]
-        for i,raw_i in enumerate(pre):
+        system = ("Normalize culture names. For each input, return a Title Cased name of 1–3 words. "
+                  "Strip bracketed tags like [AI Submission]. Return ONLY JSON: {\"names\": [..]} matching input length.")
+        def parse(text: str) -> list:
+            try:
+                out = _json_loads(text).get("names", [])
+            except Exception as e:
+                raise RuntimeError(f"Name JSON parse failed: {text[:300]}") from e
+            return out if isinstance(out, list) else []
+        out = await self.h.request_items(self.cfg.model, system, {}, pre, parse=parse, pad=True, valid=self.valid)
+        return self.finalize(pre, out)
+
+    @staticmethod
+    def valid(it) -> bool:
+        """A name finalize accepts as-is: a string of 1–3 words."""
+        return isinstance(it, str) and 1 <= len([w for w in _WS_RE.split(it.strip()) if w]) <= 3
+
+    @staticmethod
+    def finalize(pre: List[str], out: list) -> List[str]:
+        """Accept 1–3 word LLM names; otherwise fall back to the rule-based cleaner."""
+        out2: List[Optional[str]] = []
+        for i in range(len(pre)):
             cand = out[i] if i < len(out) else ""
-            if isinstance(cand,str):
-                w=[w for w in re.split(r"\s+",cand.strip()) if w]
-                if 1<=len(w)<=3:
-                    out2.append(" ".join(x.capitalize() for x in w)); continue
-            out2.append(clean_culture_name_rule_based(raw_i) or f"Culture {i+1}")
+            w = [w for w in _WS_RE.split(cand.strip()) if w] if isinstance(cand,str) else []
+            out2.append(" ".join(x.capitalize() for x in w) if 1<=len(w)<=3 else None)
+        fails = [i for i, nm in enumerate(out2) if nm is None]
+        if fails:
+            cleaned = clean_culture_name_series(pd.Series([pre[i] for i in fails])).tolist()
+            for i, nm in zip(fails, cleaned):
+                out2[i] = nm or f"Culture {i+1}"
         return out2
 
 # ------------------------------- LLM: Scopes -------------------------------
@@ -308,128 +576,144 @@ class LLMScopes:
     def __init__(self, cfg: LLMBaseConfig, h: _OpenAIHandle):
         self.cfg, self.h, self.cache = cfg, h, {}
 
+    async def _request(self, to_q: List[RowText]) -> None:
+        system = ("Classify each culture's scope using ALL provided evidence.\n"
+                  "Return ONLY JSON: {\"items\":[{\"scope\":\"global|national|regional|local\",\"confidence\":0..1}, ...]}\n"
+                  "Rules:\n"
+                  "- global: multi-country/international/worldwide\n"
+                  "- national: whole country/federal/nationwide\n"
+                  "- regional: state/province/region/district\n"
+                  "- local: city/town/neighborhood/community/family/household\n"
+                  "When ambiguous, choose the SMALLEST plausible scope, but report low confidence.\n")
+        shared = {"examples": [{"evidence": e, "scope": s} for e, s in self.FEW_SHOTS]}
+        items = await self.h.request_items(self.cfg.model, system, shared, [r.raw for r in to_q],
+                                           parse=lambda text: _json_list(text, "items"), pad=True, valid=self.valid)
+        self.accept(to_q, items or [])
+
     @staticmethod
-    def _key(text: str) -> str:
-        t = (text or "").lower()
-        t = re.sub(r"\[[^\]]*\]", " ", t)
-        t = re.sub(r"[^\w\s]", " ", t)
-        return re.sub(r"\s+", " ", t).strip()
-
-    def decide(self, evidences: List[str]) -> Tuple[List[str], List[float]]:
-        to_q, idxs = [], []
-        for i, ev in enumerate(evidences):
-            k = self._key(ev)
-            if k not in self.cache:
-                to_q.append(ev or ""); idxs.append(i)
-
-        if to_q:
-            system = {"role":"system","content":
-                "Classify each culture's scope using ALL provided evidence.\n"
-                "Return ONLY JSON: {\"items\":[{\"scope\":\"global|national|regional|local\",\"confidence\":0..1}, ...]}\n"
-                "Rules:\n"
-                "- global: multi-country/international/worldwide\n"
-                "- national: whole country/federal/nationwide\n"
-                "- regional: state/province/region/district\n"
-                "- local: city/town/neighborhood/community/family/household\n"
-                "When ambiguous, choose the SMALLEST plausible scope, but report low confidence.\n"}
-            user = {"role":"user","content": json.dumps({
-                "examples": [{"evidence": e, "scope": s} for e, s in self.FEW_SHOTS],
-                "input": to_q
-            }, ensure_ascii=False)}
-            resp = self.h.client.responses.create(model=self.cfg.model, input=[system, user], text={"verbosity":"low"})
-            text = _OpenAIHandle.parse_text(resp)
-            try:
-                items = json.loads(text).get("items", [])
-            except Exception:
-                items = []
-            for i2, ev in enumerate(to_q):
-                it = items[i2] if i2 < len(items) and isinstance(items[i2], dict) else {}
-                sc = str(it.get("scope", "")).lower().strip()
-                cf = float(it.get("confidence", 0.5))
-                if sc not in {"global","national","regional","local"}:
-                    sc = normalize_scope_rule_based_4(ev); cf = 0.45
-                self.cache[self._key(ev)] = (sc, max(0.0, min(1.0, cf)))
+    def valid(it) -> bool:
+        """A scope item accept() takes without falling back to rules."""
+        return (isinstance(it, dict) and str(it.get("scope", "")).lower().strip() in SCOPES
+                and _as_float(it.get("confidence", 0.5), None) is not None)
+
+    def accept(self, evidences: List[RowText], items: list) -> None:
+        """Cache LLM scope items (from this or the combined extractor); invalid scopes fall back to rules."""
+        for i2, ev in enumerate(evidences):
+            it = items[i2] if i2 < len(items) and isinstance(items[i2], dict) else {}
+            sc = str(it.get("scope", "")).lower().strip()
+            cf = _as_float(it.get("confidence", 0.5), 0.5)
+            if sc not in {"global","national","regional","local"}:
+                sc = normalize_scope_rule_based_4(ev); cf = 0.45
+            self.cache[ev.norm_key] = (sc, max(0.0, min(1.0, cf)))
+
+    async def decide(self, evidences: List[RowText]) -> Tuple[List[str], List[float]]:
+        pending: Dict[str, RowText] = {}   # repeated evidence (template answers) is asked once
+        for ev in evidences:
+            if ev.norm_key not in self.cache: pending.setdefault(ev.norm_key, ev)
+        to_q = list(pending.values())
+
+        bs = self.cfg.scopes_bs
+        await asyncio.gather(*(self._request(to_q[i:i+bs]) for i in range(0, len(to_q), bs)))
 
         scopes, confs = [], []
         for ev in evidences:
-            sc, cf = self.cache.get(self._key(ev), (normalize_scope_rule_based_4(ev), 0.45))
+            sc, cf = self.cache.get(ev.norm_key) or (normalize_scope_rule_based_4(ev), 0.45)
             scopes.append(sc); confs.append(cf)
         return scopes, confs
 
-def rebalance_scopes(scopes: List[str], confs: List[float], evidences: List[str]) -> List[str]:
+# explicit scope words that pin a row to its current scope during rebalancing
+_HARD_LOCK = {
+    "global":   re.compile(r"\b(international|global|worldwide|multi-?country)\b"),
+    "national": re.compile(r"\b(national|nationwide|whole country|federal)\b"),
+    "regional": re.compile(r"\b(state|province|regional|district)\b"),
+    "local":    re.compile(r"\b(city|town|neighborhood|community|household|family)\b"),
+}
+
+def rebalance_scopes(scopes: List[str], confs: List[float], evidences: List[RowText]) -> List[str]:
     """Push toward an even split by reassigning LOW-confidence rows first; never override hard cues."""
     n = len(scopes); target = n / 4.0
-    counts = {k: scopes.count(k) for k in ["global","national","regional","local"]}
-    def hard_lock(ev: str, sc: str) -> bool:
-        t = (ev or "").lower()
-        if sc == "global"   and re.search(r"\b(international|global|worldwide|multi-?country)\b", t): return True
-        if sc == "national" and re.search(r"\b(national|nationwide|whole country|federal)\b", t):     return True
-        if sc == "regional" and re.search(r"\b(state|province|regional|district)\b", t):              return True
-        if sc == "local"    and re.search(r"\b(city|town|neighborhood|community|household|family)\b", t): return True
-        return False
+    counts = Counter(scopes)
+    for k in SCOPES: counts.setdefault(k, 0)
+    def hard_lock(t: str, sc: str) -> bool:
+        pat = _HARD_LOCK.get(sc)
+        return bool(pat and pat.search(t))
     order = sorted(range(n), key=lambda i: confs[i])  # lowest confidence first
     for i in order:
-        sc, cf, ev = scopes[i], confs[i], evidences[i]
-        if cf >= 0.55 or hard_lock(ev, sc): continue
-        want = min(counts, key=lambda k: counts[k] - target)
+        sc, cf = scopes[i], confs[i]
+        if cf >= 0.55 or hard_lock(evidences[i].low, sc): continue
+        want = min(SCOPES, key=counts.__getitem__)   # same argmin as counts[k] - target
         if counts[want] < target - 0.5 and want != sc:
             counts[sc] -= 1; counts[want] += 1; scopes[i] = want
     return scopes
 
 # --------------------------- Rule-based helpers ----------------------------
+def _kw_re(*words: str) -> re.Pattern:
+    """One substring scan for a keyword bag (same matches as any(k in t for k in words))."""
+    return re.compile("|".join(map(re.escape, words)))
+
+_NEG_RE         = _kw_re(*NEGATION_TOKENS)
+_DIRECT_KW      = _kw_re("meet", "canvas", "event", "rally", "callbank", "phonebank", "tabling")
+_ORG_KW         = _kw_re("organize", "planning", "logistics", "coordination", "coordinate")
+_ADV_KW         = _kw_re("post", "blog", "newsletter", "op-ed", "speech", "write", "podcast", "video")
+_REC_KW         = _kw_re("recruit", "onboard", "invite", "bring", "outreach")
+_LEARN_KW       = _kw_re("training", "workshop", "class", "course", "seminar", "teach-in")
+_CONSTRAINED_KW = _kw_re("two jobs", "overtime", "caregiv", "child", "elder", "full-time student")
+_FREE_KW        = _kw_re("plenty of time", "on sabbatical", "gap year")
+_DOLLAR_RE      = re.compile(r"\$\s*([\d,]+)")
+_REC_RE         = re.compile(r"\b(\d+)\s+(?:new|recruit|onboard|join|members?)")
+# first hit wins, in this order ("biweekly" contains "weekly", so weekly takes it — kept as-is)
+_CADENCE = (("daily", 20.0), ("weekly", 4.0), ("biweekly", 2.0), ("bi-weekly", 2.0), ("monthly", 1.0), ("quarterly", 0.5))
+
 def _has_negation(t: str) -> bool:
-    tl = t.lower()
-    return any(tok in tl for tok in NEGATION_TOKENS)
+    return bool(_NEG_RE.search(t.lower()))
 
 def _cadence_multiplier(t: str) -> float:
     tl = t.lower()
-    if "daily" in tl: return 20.0
-    if "weekly" in tl: return 4.0
-    if "biweekly" in tl or "bi-weekly" in tl: return 2.0
-    if "monthly" in tl: return 1.0
-    if "quarterly" in tl: return 0.5
-    return 0.0
+    return next((m for k, m in _CADENCE if k in tl), 0.0)
 
-def rule_based_estimate(txt: str) -> Tuple[dict, dict]:
-    t = (txt or "").lower()
+_ESTIMATE_KEYS = ("hours_direct", "hours_organizing", "dollars_donated",
+                  "advocacy_outputs", "recruitment_count", "learning_hours")
+
+@lru_cache(maxsize=4096)
+def _rule_based_estimate_cached(txt: str) -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+    """(actions, opp) as hashable tuples in _ESTIMATE_KEYS order; pure, so memoized per text."""
+    t = txt.lower()
     mult = _cadence_multiplier(t)
     hours_direct = 0.0; hours_organizing = 0.0
-    if any(k in t for k in ["meet", "canvas", "event", "rally", "callbank", "phonebank", "tabling"]):
+    if _DIRECT_KW.search(t):
         hours_direct = max(hours_direct, (2.0 if mult == 0 else 2.0 * mult))
-    if any(k in t for k in ["organize", "planning", "logistics", "coordination", "coordinate"]):
+    if _ORG_KW.search(t):
         hours_organizing = max(hours_organizing, (4.0 if mult == 0 else 1.0 * mult))
-    m = re.search(r"\$\s*([\d,]+)", t)
+    m = _DOLLAR_RE.search(t)
     dollars = float(m.group(1).replace(",", "")) if m else (25.0 * mult if "donat" in t else 0.0)
     adv = 0.0
-    if any(k in t for k in ["post", "blog", "newsletter", "op-ed", "speech", "write", "podcast", "video"]):
+    if _ADV_KW.search(t):
         adv = max(adv, (1.0 if mult == 0 else 1.0 * mult))
     rec = 0.0
-    mrec = re.search(r"\b(\d+)\s+(new|recruit|onboard|join|members?)", t)
+    mrec = _REC_RE.search(t)
     if mrec: rec = float(mrec.group(1))
-    elif any(k in t for k in ["recruit", "onboard", "invite", "bring", "outreach"]):
+    elif _REC_KW.search(t):
         rec = max(rec, 0.5 * mult if mult > 0 else 1.0)
     learn = 0.0
-    if any(k in t for k in ["training", "workshop", "class", "course", "seminar", "teach-in"]):
+    if _LEARN_KW.search(t):
         learn = max(learn, 4.0 if mult == 0 else 2.0 * mult)
-    actions = {
-        "hours_direct": round(hours_direct, 3),
-        "hours_organizing": round(hours_organizing, 3),
-        "dollars_donated": round(dollars, 2),
-        "advocacy_outputs": round(adv, 3),
-        "recruitment_count": round(rec, 3),
-        "learning_hours": round(learn, 3),
-    }
-    opp = {k: 0.5 for k in actions}
-    if any(k in t for k in ["two jobs", "overtime", "caregiv", "child", "elder", "full-time student"]):
-        opp = {k: 0.7 for k in actions}
-    if any(k in t for k in ["plenty of time", "on sabbatical", "gap year"]):
-        opp = {k: 0.3 for k in actions}
-    return actions, opp
+    actions = (round(hours_direct, 3), round(hours_organizing, 3), round(dollars, 2),
+               round(adv, 3), round(rec, 3), round(learn, 3))
+    opp = 0.5
+    if _CONSTRAINED_KW.search(t):
+        opp = 0.7
+    if _FREE_KW.search(t):
+        opp = 0.3
+    return actions, (opp,) * len(_ESTIMATE_KEYS)
+
+def rule_based_estimate(txt: str) -> Tuple[dict, dict]:
+    """(actions, opp) dicts keyed by _ESTIMATE_KEYS."""
+    a, o = _rule_based_estimate_cached(txt or "")
+    return dict(zip(_ESTIMATE_KEYS, a)), dict(zip(_ESTIMATE_KEYS, o))
 
 # --------------------------- LLM: Action Extractor -------------------------
 class LLMActionExtractor:
-    ACTION_KEYS = ["hours_direct","hours_organizing","dollars_donated",
-                   "advocacy_outputs","recruitment_count","learning_hours"]
+    ACTION_KEYS = list(_ESTIMATE_KEYS)
 
     FEW_SHOTS = [
         {
@@ -462,68 +746,60 @@ class LLMActionExtractor:
     def _payload_row(text: str) -> dict:
         return {"text": (text or "")[:2000]}
 
-    def _request(self, texts: List[str]) -> List[dict] | None:
-        system = {
-            "role": "system",
-            "content":
-                "Extract per-person MONTHLY action magnitudes and opportunity costs (0..1). "
-                "ALWAYS ESTIMATE reasonable monthly numbers from cadence and hints if exact numbers are missing. "
-                "Heuristics (unless contradicted): daily≈20/mo; weekly≈4/mo; biweekly≈2/mo; monthly≈1/mo; quarterly≈0.5/mo. "
-                "Hours: meeting≈2h per occurrence; organizing≈4h if mentioned; advocacy outputs per cadence; "
-                "recruitment from onboard/invite; learning 2–6h per training/workshop/class. "
-                "Only output ZERO when explicitly denied (e.g., 'no events', 'none', 'did not'). "
-                "Opportunity costs (opp in [0,1]): infer constraints (workload, caregiving, school): low≈0.2, medium≈0.5, high≈0.8. "
-                "Return ONLY JSON with key 'actions', an array matching input length. Numbers only."
-        }
-        user = {"role":"user","content": json.dumps({
-            "schema_keys": self.ACTION_KEYS,
-            "few_shots": self.FEW_SHOTS,
-            "input": [self._payload_row(t) for t in texts]
-        }, ensure_ascii=False)}
-        resp = self.h.client.responses.create(model=self.cfg.model, input=[system, user],
-                                              text={"verbosity":"low"})
-        text = _OpenAIHandle.parse_text(resp)
-        try:
-            arr = json.loads(text).get("actions", [])
-            return arr if isinstance(arr, list) else None
-        except Exception:
-            return None
-
-    def extract(self, texts: List[str]) -> List[dict]:
-        if not texts: return []
-        arr = self._request(texts)
-        if arr is None or len(arr) != len(texts):
-            log(f"      ⚠️ action LLM returned {('none' if arr is None else len(arr))} for {len(texts)} inputs; retrying once…")
-            arr = self._request(texts)
-        out: List[dict] = []
-        zero_vecs = 0
-        for i in range(len(texts)):
-            row = {}
-            t = texts[i] if i < len(texts) else ""
-            if isinstance(arr, list) and i < len(arr) and isinstance(arr[i], dict):
-                row = arr[i]
-            actions = {k: float(row.get(k, 0) or 0) for k in self.ACTION_KEYS}
+    async def _request(self, texts: List[str]) -> List[dict] | None:
+        system = ("Extract per-person MONTHLY action magnitudes and opportunity costs (0..1). "
+                  "ALWAYS ESTIMATE reasonable monthly numbers from cadence and hints if exact numbers are missing. "
+                  "Heuristics (unless contradicted): daily≈20/mo; weekly≈4/mo; biweekly≈2/mo; monthly≈1/mo; quarterly≈0.5/mo. "
+                  "Hours: meeting≈2h per occurrence; organizing≈4h if mentioned; advocacy outputs per cadence; "
+                  "recruitment from onboard/invite; learning 2–6h per training/workshop/class. "
+                  "Only output ZERO when explicitly denied (e.g., 'no events', 'none', 'did not'). "
+                  "Opportunity costs (opp in [0,1]): infer constraints (workload, caregiving, school): low≈0.2, medium≈0.5, high≈0.8. "
+                  "Return ONLY JSON with key 'actions', an array matching input length. Numbers only.")
+        shared = {"schema_keys": self.ACTION_KEYS, "few_shots": self.FEW_SHOTS}
+        return await self.h.request_items(self.cfg.model, system, shared, [self._payload_row(t) for t in texts],
+                                          parse=lambda text: _json_list(text, "actions"), valid=self.valid)
+
+    @classmethod
+    def valid(cls, it) -> bool:
+        """An action row whose magnitudes and opp costs finalize can read without defaulting."""
+        return isinstance(it, dict) and _nums_ok(it, cls.ACTION_KEYS, 0.0) and _nums_ok(it.get("opp"), cls.ACTION_KEYS, 0.5)
+
+    async def extract(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        if not texts: return self.finalize([], None)
+        arr = await hedged_retry(lambda: self._request(texts), lambda r: isinstance(r, list) and len(r) == len(texts),
+                                   label="action LLM")
+        return self.finalize(texts, arr)
+
+    @classmethod
+    def estimate(cls, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Rule-based (actions, opp) as (N, 6) arrays in ACTION_KEYS order."""
+        est = [_rule_based_estimate_cached(t or "") for t in texts]   # tuples already in ACTION_KEYS order
+        A = np.array([a for a, _ in est], dtype=np.float64).reshape(-1, len(cls.ACTION_KEYS))
+        O = np.array([o for _, o in est], dtype=np.float64).reshape(-1, len(cls.ACTION_KEYS))
+        return A, O
+
+    def finalize(self, texts: List[str], arr: List[dict] | None) -> Tuple[np.ndarray, np.ndarray]:
+        """Coerce LLM rows to (N, 6) action/opp arrays, filling zeros with rule-based estimates unless negated."""
+        n, K = len(texts), len(self.ACTION_KEYS)
+        A = np.zeros((n, K)); O = np.zeros((n, K))
+        for i in range(n):
+            row = arr[i] if isinstance(arr, list) and i < len(arr) and isinstance(arr[i], dict) else {}
             opp = row.get("opp", {})
             if not isinstance(opp, dict): opp={}
-            opp = {k: min(1.0,max(0.0, float(opp.get(k, 0.5) or 0.5))) for k in self.ACTION_KEYS}
-            guessed_actions, guessed_opp = rule_based_estimate(t)
-            for k in self.ACTION_KEYS:
-                if actions.get(k, 0.0) == 0.0 and not _has_negation(t):
-                    actions[k] = guessed_actions[k]
-            if not _has_negation(t) and all(v == 0.0 for v in actions.values()):
-                actions = guessed_actions.copy()
-            if all(v == 0.0 for v in actions.values()):
-                zero_vecs += 1
-            out.append({"actions": actions, "opp": opp})
+            A[i] = [_as_float(row.get(k, 0) or 0, 0.0) for k in self.ACTION_KEYS]
+            O[i] = [min(1.0,max(0.0, _as_float(opp.get(k, 0.5) or 0.5, 0.5))) for k in self.ACTION_KEYS]
+        GA, GO = self.estimate(texts)
+        free = ~np.array([_has_negation(t) for t in texts], dtype=bool)
+        A = np.where((A == 0.0) & free[:, None], GA, A)   # per-key fill; an all-zero free row ends up == its estimate
+        zero = (A == 0.0).all(axis=1)
+        zero_vecs = int(zero.sum())
         if zero_vecs:
-            log(f"      ℹ️ action batch zeros (after safeguard): {zero_vecs}/{len(out)}")
-        if zero_vecs / max(1, len(out)) >= 0.7:
+            log(f"      ℹ️ action batch zeros (after safeguard): {zero_vecs}/{n}")
+        if zero_vecs / max(1, n) >= 0.7:
             log("      ⚠️ LLM outputs mostly zeros; enforcing rule-based estimates for zero rows in this batch.")
-            for i in range(len(out)):
-                if all(v == 0.0 for v in out[i]["actions"].values()) and not _has_negation(texts[i]):
-                    est_a, est_o = rule_based_estimate(texts[i])
-                    out[i] = {"actions": est_a, "opp": est_o}
-        return out
+            m = zero & free
+            A[m], O[m] = GA[m], GO[m]
+        return A, O
 
 # --------------------------- LLM: Atmosphere Extractor ----------------------
 class LLMAtmosphereExtractor:
@@ -542,52 +818,295 @@ class LLMAtmosphereExtractor:
     def _payload_row(values: str, practices: str, affils: str) -> dict:
         text = f"values: {values or ''} | practices: {practices or ''} | own_words: {affils or ''}"
         return {"text": text[:2000]}
-    def extract(self, values_col: List[str], practices_col: List[str], affils_col: List[str]) -> List[Tuple[float,float,float]]:
-        system = {"role":"system","content":
-            "Read each item's text and output normalized scores in [0,1] for: "
-            "warmth (affective/expressive), energy (tempo/activation), formality (structure/ritual). "
-            "Return ONLY JSON: {\"traits\": [{\"warmth\":0..1, \"energy\":0..1, \"formality\":0..1}, ...]} "
-            "Same order/length as input. Numbers only."}
-        user = {"role":"user","content": json.dumps({
-            "few_shots": self.FEW_SHOTS,
-            "input": [self._payload_row(v, p, a) for v, p, a in zip(values_col, practices_col, affils_col)]
-        }, ensure_ascii=False)}
-        resp = self.h.client.responses.create(model=self.cfg.model, input=[system, user],
-                                              text={"verbosity":"low"})
-        text = _OpenAIHandle.parse_text(resp)
-        try:
-            arr = json.loads(text).get("traits", [])
-        except Exception:
-            arr = []
+    async def extract(self, values_col: List[str], practices_col: List[str], affils_col: List[str]) -> List[Tuple[float,float,float]]:
+        system = ("Read each item's text and output normalized scores in [0,1] for: "
+                  "warmth (affective/expressive), energy (tempo/activation), formality (structure/ritual). "
+                  "Return ONLY JSON: {\"traits\": [{\"warmth\":0..1, \"energy\":0..1, \"formality\":0..1}, ...]} "
+                  "Same order/length as input. Numbers only.")
+        rows = [self._payload_row(v, p, a) for v, p, a in zip(values_col, practices_col, affils_col)]
+        arr = await self.h.request_items(self.cfg.model, system, {"few_shots": self.FEW_SHOTS}, rows,
+                                         parse=lambda text: _json_list(text, "traits"), pad=True, valid=self.valid)
+        return self.finalize(len(values_col), arr or [])
+
+    @staticmethod
+    def valid(it) -> bool:
+        return isinstance(it, dict) and _nums_ok(it, ("warmth", "energy", "formality"), 0.5)
+
+    @staticmethod
+    def finalize(n: int, arr: list) -> List[Tuple[float,float,float]]:
         out: List[Tuple[float,float,float]] = []
-        for i in range(len(values_col)):
+        for i in range(n):
             row = arr[i] if i < len(arr) and isinstance(arr[i], dict) else {}
-            w = float(row.get("warmth", 0.5) or 0.5)
-            e = float(row.get("energy", 0.5) or 0.5)
-            f = float(row.get("formality", 0.5) or 0.5)
+            w = _as_float(row.get("warmth", 0.5) or 0.5, 0.5)
+            e = _as_float(row.get("energy", 0.5) or 0.5, 0.5)
+            f = _as_float(row.get("formality", 0.5) or 0.5, 0.5)
             out.append((max(0,min(1,w)), max(0,min(1,e)), max(0,min(1,f))))
         return out
 
+# (pattern, weight) per trait, applied in order; unparenthesized alternations keep their original
+# precedence, e.g. r"\bmonthly|regular\b" is "\bmonthly" OR "regular\b".
+_WARMTH_RES    = ((re.compile(r"\b(warm|welcom|friendly|celebrat|playful|care|solidar|joy)\b"), 0.20),
+                  (re.compile(r"\b(reserved|formalistic|analytical|distant|stoic)\b"), -0.10))
+_ENERGY_RES    = ((re.compile(r"\bdaily\b"), 0.25), (re.compile(r"\bweekly\b"), 0.15),
+                  (re.compile(r"\bmonthly|regular\b"), 0.05), (re.compile(r"\brally|march|canvass|campaign|festival\b"), 0.10))
+_FORMALITY_RES = ((re.compile(r"\b(protocol|ceremon|orthodox|hierarch|bylaws|charter)\b"), 0.25),
+                  (re.compile(r"\binformal|casual|loose\b"), -0.15),
+                  (re.compile(r"\bagenda|minutes|governance|committee\b"), 0.10))
+
 def fallback_traits(values_col: List[str], practices_col: List[str]) -> List[Tuple[float, float, float]]:
+    def score(base: float, pats, txt: str) -> float:
+        for pat, w in pats:
+            if pat.search(txt): base += w
+        return max(0,min(1,base))
     res: List[Tuple[float, float, float]] = []
     for v, p in zip(values_col, practices_col):
         txt = f"{v or ''} {p or ''}".lower()
-        warmth = 0.50
-        if re.search(r"\b(warm|welcom|friendly|celebrat|playful|care|solidar|joy)\b", txt): warmth += 0.20
-        if re.search(r"\b(reserved|formalistic|analytical|distant|stoic)\b", txt): warmth -= 0.10
-        energy = 0.30
-        energy += 0.25 * bool(re.search(r"\bdaily\b", txt))
-        energy += 0.15 * bool(re.search(r"\bweekly\b", txt))
-        energy += 0.05 * bool(re.search(r"\bmonthly|regular\b", txt))
-        energy += 0.10 * bool(re.search(r"\brally|march|canvass|campaign|festival\b", txt))
-        formality = 0.40
-        formality += 0.25 * bool(re.search(r"\b(protocol|ceremon|orthodox|hierarch|bylaws|charter)\b", txt))
-        formality -= 0.15 * bool(re.search(r"\binformal|casual|loose\b", txt))
-        formality += 0.10 * bool(re.search(r"\bagenda|minutes|governance|committee\b", txt))
-        res.append((max(0,min(1,warmth)), max(0,min(1,energy)), max(0,min(1,formality))))
+        res.append((score(0.50, _WARMTH_RES, txt), score(0.30, _ENERGY_RES, txt), score(0.40, _FORMALITY_RES, txt)))
     return res
 
+# ------------------ LLM: Combined (names/scope/actions/atmosphere) ----------
+def _evidence_text(scope: str, values: str, own_words: str) -> str:
+    return f"declared_scope: {scope} | values_traits: {values} | own_words: {own_words}"
+
+def _action_text(values: str, practices: str, own_words: str) -> str:
+    return f"values: {values} | practices: {practices} | own_words: {own_words}"
+
+class LLMCombinedExtractor:
+    """
+    One request per batch for name, scope, actions and atmosphere, so the shared instructions
+    and few-shots are sent once instead of four times. The per-task extractors post-process the
+    reply, and take over for a batch whose combined reply is unusable.
+    Rows: {"name","scope","values","practices","own_words"} (raw cell text).
+    """
+    SPEC_HEAD = (
+        "For EACH input row return one item with the fields below. Use ALL of the row's fields as evidence.\n"
+        "name: normalize the culture name to Title Cased 1–3 words; strip bracketed tags like [AI Submission].\n"
+        "scope + confidence (0..1): global = multi-country/international/worldwide; national = whole country/federal/nationwide; "
+        "regional = state/province/region/district; local = city/town/neighborhood/community/family/household. "
+        "When ambiguous, choose the SMALLEST plausible scope, but report low confidence.\n"
+        "traits: warmth (affective/expressive), energy (tempo/activation), formality (structure/ritual), each in [0,1].\n"
+    )
+    SPEC_ACTIONS = (
+        "actions + opp: per-person MONTHLY action magnitudes for schema_keys and opportunity costs (0..1). "
+        "ALWAYS ESTIMATE from cadence and hints if exact numbers are missing: daily≈20/mo; weekly≈4/mo; biweekly≈2/mo; "
+        "monthly≈1/mo; quarterly≈0.5/mo; meeting≈2h per occurrence; organizing≈4h if mentioned; advocacy outputs per cadence; "
+        "recruitment from onboard/invite; learning 2–6h per training/workshop/class. "
+        "Only output ZERO when explicitly denied (e.g., 'no events', 'none', 'did not'). "
+        "opp: infer constraints (workload, caregiving, school): low≈0.2, medium≈0.5, high≈0.8.\n"
+    )
+    SPEC_FORMAT = (
+        "Return ONLY JSON: {{\"items\": [{{\"name\": str, \"scope\": \"global|national|regional|local\", \"confidence\": 0..1, "
+        "{actions}\"traits\": {{\"warmth\":0..1, \"energy\":0..1, \"formality\":0..1}}}}, ...]}} "
+        "Same order/length as rows. Numbers only."
+    )
+
+    def __init__(self, cfg: LLMBaseConfig, h: _OpenAIHandle, names: LLMNames, scopes: LLMScopes,
+                 actions: LLMActionExtractor, atm: LLMAtmosphereExtractor):
+        self.cfg, self.h = cfg, h
+        self.names, self.scopes, self.actions, self.atm = names, scopes, actions, atm
+
+    @staticmethod
+    def _payload_row(row: dict) -> dict:
+        return {"name": LLMNames._preclean(row["name"]),
+                **{k: (row[k] or "")[:2000] for k in ("scope", "values", "practices", "own_words")}}
+
+    def _prompt(self, with_actions: bool) -> Tuple[str, dict]:
+        system = (self.SPEC_HEAD + (self.SPEC_ACTIONS if with_actions else "")
+                  + self.SPEC_FORMAT.format(actions="\"actions\": {key: number}, \"opp\": {key: 0..1}, " if with_actions else ""))
+        examples = {"scope": [{"evidence": e, "scope": sc} for e, sc in LLMScopes.FEW_SHOTS],
+                    "traits": LLMAtmosphereExtractor.FEW_SHOTS}
+        if with_actions: examples["actions"] = LLMActionExtractor.FEW_SHOTS
+        shared = {"schema_keys": LLMActionExtractor.ACTION_KEYS if with_actions else [], "examples": examples}
+        return system, shared
+
+    def fit_batch_size(self, rows: Iterable[dict], with_actions: bool) -> int:
+        system, shared = self._prompt(with_actions)
+        return cap_batch_size(self.cfg.combined_bs, system + _json_dumps(shared),
+                              (_json_dumps(self._payload_row(r)) for r in rows), self.cfg.max_prompt_tokens)
+
+    async def _request(self, rows: List[dict], with_actions: bool) -> List[dict] | None:
+        system, shared = self._prompt(with_actions)
+        # any dict is worth caching: extract() hands each sub-part to its stage, whose finalize/accept
+        # falls back to rules for a bad one, so a rerun never re-sends a row over one odd field
+        return await self.h.request_items(self.cfg.model, system, shared, [self._payload_row(r) for r in rows],
+                                          parse=lambda text: _json_list(text, "items"), rows_key="rows",
+                                          valid=lambda it: isinstance(it, dict))
+
+    async def extract(self, rows: List[dict], with_actions: bool = True) -> Dict[str, object]:
+        """Returns {"names", "traits", "actions": (A, O) arrays or None}; scopes are left in the LLMScopes cache."""
+        if not rows: return {"names": [], "traits": [], "actions": self.actions.finalize([], None) if with_actions else None}
+        n = len(rows)
+        evidences = [RowText.of(_evidence_text(r["scope"], r["values"], r["own_words"])) for r in rows]
+        action_texts = [_action_text(r["values"], r["practices"], r["own_words"]) for r in rows]
+        try:
+            items = await self._request(rows, with_actions)
+        except Exception as e:
+            log(f"      ⚠️ combined LLM error: {e}"); items = None
+        if items is not None and len(items) == n:
+            items = [it if isinstance(it, dict) else {} for it in items]
+            self.scopes.accept(evidences, items)
+            out = {"names": self.names.finalize([self._payload_row(r)["name"] for r in rows], [it.get("name") for it in items]),
+                   "traits": self.atm.finalize(n, [it.get("traits") for it in items]), "actions": None}
+            if with_actions:
+                out["actions"] = self.actions.finalize(action_texts, [
+                    {**(it.get("actions") if isinstance(it.get("actions"), dict) else {}), "opp": it.get("opp", {})}
+                    for it in items])
+            return out
+
+        # Unusable reply → per-task requests for this batch (scopes are picked up later by LLMScopes.decide).
+        log(f"      ⚠️ combined LLM returned {('none' if items is None else len(items))} for {n} rows; using per-task requests…")
+        values = [r["values"] for r in rows]; practices = [r["practices"] for r in rows]
+        names, traits, actions = await asyncio.gather(
+            self.names.normalize([r["name"] for r in rows]),
+            self.atm.extract(values, practices, [r["own_words"] for r in rows]),
+            self.actions.extract(action_texts) if with_actions else asyncio.sleep(0, None),
+            return_exceptions=True)
+        if isinstance(names, Exception): raise names
+        if isinstance(traits, Exception):
+            if not _is_openai_api_error(traits): raise traits
+            log(f"      ⚠️ atmosphere LLM API error, using fallback traits: {traits}")
+            traits = fallback_traits(values, practices)
+        if isinstance(actions, Exception):
+            log(f"      ⚠️ actions LLM error: {actions}")
+            actions = self.actions.estimate(action_texts)
+        return {"names": names, "traits": traits, "actions": actions}
+
 # ---------------------- LLM: Kinships & Affiliation (scapes) ----------------
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"   # what `re` treats as \w for str patterns
+
+def _at_boundary(t: str, i: int) -> bool:
+    """True where `re` would match \\b at index i of t."""
+    return (i > 0 and _is_word(t[i-1])) != (i < len(t) and _is_word(t[i]))
+
+class _MentionMatcher:
+    """
+    Finds which lower-cased known names occur in a text as whole words (re's \\b semantics).
+    With pyahocorasick: one automaton pass yields every (overlapping) occurrence, kept when both ends sit
+    on a word boundary. Without it: one whole-word alternation, longest first, scanned as a lookahead so
+    every start position reports its longest hit; names that are prefixes of a longer name are re-checked
+    at that hit via `nested`, so nested mentions ("new york" inside "new york city") are not lost.
+    """
+    def __init__(self, known: Tuple[str, ...]):
+        names = sorted({n.lower() for n in known if n}, key=len, reverse=True)
+        self.auto = self.first = None; self.nested: Dict[str, List[Tuple[str, re.Pattern]]] = {}
+        if not names: return
+        if ahocorasick is not None:
+            self.auto = ahocorasick.Automaton()
+            for nm in names: self.auto.add_word(nm, nm)
+            self.auto.make_automaton()
+            return
+        self.first = re.compile(r"(?=\b(" + "|".join(map(re.escape, names)) + r")\b)")
+        for i, long in enumerate(names):
+            for short in names[i+1:]:
+                if len(short) < len(long) and long.startswith(short):
+                    self.nested.setdefault(long, []).append((short, re.compile(re.escape(short) + r"\b")))
+
+    def found(self, t: str) -> set:
+        out = set()
+        if self.auto is not None:
+            for end, nm in self.auto.iter(t):
+                if _at_boundary(t, end + 1) and _at_boundary(t, end + 1 - len(nm)): out.add(nm)
+        elif self.first is not None:
+            for m in self.first.finditer(t):
+                hit = m.group(1); out.add(hit)
+                for q, tail in self.nested.get(hit, ()):   # shorter known names that are prefixes of this hit
+                    if tail.match(t, m.start()): out.add(q)
+        return out
+
+@lru_cache(maxsize=8)
+def _mention_matcher(known: Tuple[str, ...]) -> _MentionMatcher:
+    return _MentionMatcher(known)
+
+def _name_tokens(s: str) -> List[str]:
+    """Fuzzy-match tokens: lower-cased words with punctuation dropped."""
+    return [t for t in _WS_RE.split(_NONWORD_RE.sub(" ", s.lower())) if t]
+
+def _ws_tokens(s: str) -> List[str]:
+    """Nearest-name tokens: lower-cased whitespace split, kept as-is."""
+    return _WS_RE.split(s.lower())
+
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _jaccard_nb(cand, flat, offsets):
+        """Jaccard of one sorted id array against every CSR row (sorted ids per known name)."""
+        n = len(offsets) - 1; m = len(cand); out = np.zeros(n)
+        for j in numba.prange(n):
+            a, b = offsets[j], offsets[j + 1]; i = 0; k = a; inter = 0
+            while i < m and k < b:
+                if cand[i] == flat[k]:  inter += 1; i += 1; k += 1
+                elif cand[i] < flat[k]: i += 1
+                else:                   k += 1
+            uni = m + (b - a) - inter
+            out[j] = inter / uni if uni > 0 else 0.0
+        return out
+
+NUMBA_MIN_KNOWN = 1000
+
+class _KnownIndex:
+    """
+    Token sets, sizes, stable hashes and token postings for one known-names list, built once and reused.
+    Token ids are also laid out CSR-style (flat sorted ids + offsets) for the numba Jaccard kernel.
+    """
+    def __init__(self, known: Tuple[str, ...], tokenize: Callable[[str], List[str]]):
+        self.names = list(known); self.tokenize = tokenize
+        self.tokens = [frozenset(tokenize(k)) for k in known]
+        self.sizes = np.array([len(t) for t in self.tokens], dtype=np.int64)
+        self.hashes = np.fromiter((stable_hash_int(k) for k in known), dtype=np.uint64, count=len(known))
+        post: Dict[str, List[int]] = {}
+        for i, ts in enumerate(self.tokens):
+            for t in ts: post.setdefault(t, []).append(i)
+        self.postings = {t: np.array(ix, dtype=np.int64) for t, ix in post.items()}
+        self.vocab = {t: i for i, t in enumerate(post)}
+        self.flat = np.array([self.vocab[t] for ts in self.tokens for t in sorted(ts, key=self.vocab.__getitem__)],
+                             dtype=np.int32)
+        self.offsets = np.concatenate([[0], np.cumsum(self.sizes)]).astype(np.int64)
+        self.ids: Dict[str, int] = {}   # equal names share an id, so "not self" is one vectorized compare
+        self.codes = np.array([self.ids.setdefault(k, len(self.ids)) for k in known], dtype=np.int64)
+        self.nonempty = np.array([bool(k) for k in known], dtype=bool)
+
+    def sims(self, base: set) -> np.ndarray:
+        """Token-Jaccard of `base` against every known name."""
+        if numba is not None and len(self.names) >= NUMBA_MIN_KNOWN:
+            ids = [self.vocab.get(t, -1 - i) for i, t in enumerate(base)]   # unseen tokens: distinct negative ids
+            return _jaccard_nb(np.sort(np.array(ids, dtype=np.int32)), self.flat, self.offsets)
+        hits = [self.postings[t] for t in base if t in self.postings]
+        inter = np.bincount(np.concatenate(hits), minlength=len(self.names)) if hits else np.zeros(len(self.names), np.int64)
+        uni = len(base) + self.sizes - inter
+        return np.where(uni > 0, inter / np.maximum(1, uni), 0.0)
+
+    def resolve(self, cand: str, min_sim: float) -> Optional[str]:
+        """Best token-Jaccard known name (ties → smallest stable hash), if its similarity reaches min_sim."""
+        base = set(self.tokenize(cand))
+        if not base: return None
+        sim = np.where(self.sizes > 0, self.sims(base), 0.0)
+        best_sim = sim.max() if len(sim) else 0.0
+        if best_sim <= 0.0 or best_sim < min_sim: return None
+        tied = np.flatnonzero(sim == best_sim)
+        return self.names[tied[np.argmin(self.hashes[tied])]]
+
+    def nearest(self, self_name: str, k: int) -> List[str]:
+        """Up to k names by descending similarity to self_name, then ascending stable hash, then list order."""
+        return self._nearest(set(self.tokenize(self_name)), self.ids.get(self_name, -1), k)
+
+    def nearest_at(self, i: int, k: int) -> List[str]:
+        """nearest() for names[i], reusing its precomputed token set."""
+        return self._nearest(self.tokens[i], int(self.codes[i]), k)
+
+    def _nearest(self, base, code: int, k: int) -> List[str]:
+        ix = np.flatnonzero(self.nonempty & (self.codes != code))
+        if not len(ix): return []
+        sim = self.sims(base)[ix]
+        if 0 < k < len(ix):   # keep only candidates at or above the k-th best similarity (all of its ties)
+            keep = np.flatnonzero(sim >= np.partition(sim, len(sim) - k)[len(sim) - k])
+            ix, sim = ix[keep], sim[keep]
+        order = ix[np.lexsort((self.hashes[ix], -sim))]   # lexsort is stable: equal keys keep list order
+        return [self.names[i] for i in order[:k]]
+
+@lru_cache(maxsize=8)
+def _known_index(known: Tuple[str, ...], tokenize: Callable[[str], List[str]] = _name_tokens) -> _KnownIndex:
+    return _KnownIndex(known, tokenize)
+
 class LLMKinAff:
     """
     Returns per row:
@@ -604,6 +1123,14 @@ class LLMKinAff:
     _MEDIA_RE   = re.compile(r"(co-?brand|official channel|brand(ed)?)", re.I)
     _ETHNO_RE   = re.compile(r"(appointed|staffed by|seconded)", re.I)
 
+    SYSTEM = ("Extract a culture's Affiliation (single parent) and Kinships (3–10 peers) using Appadurai's scapes. "
+              "Use ONLY the provided known_cultures list. Do not invent unseen names. "
+              "Affiliation: hierarchical/hosting ('chapter of','under','member of','hosted by','fiscal sponsor','governed by'). "
+              "Return at most one affiliation; if multiple candidates appear, choose the strongest single parent. "
+              "Kinships: peer collaborations with evidence in ≥2 scapes (Ethno/Tech/Finance/Media/Ideo) or strong single scape (Finance or Tech with MoU). "
+              "Limit Mediascape-only links to ≤50%. If Affiliation chosen, do not include it in Kinships. "
+              "Return ONLY JSON: {\"items\": [{\"affiliation\": <name or null>, \"kinships\": [names...]}, ...]} (same order/length).")
+
     def __init__(self, cfg: LLMBaseConfig, h: _OpenAIHandle):
         self.cfg, self.h = cfg, h
 
@@ -611,57 +1138,37 @@ class LLMKinAff:
     def _payload_row(self_name: str, kin_text: str, aff_text: str) -> dict:
         return {"self": self_name, "kin_text": (kin_text or "")[:2000], "aff_text": (aff_text or "")[:2000]}
 
-    def _request(self, rows: List[dict], known_names: List[str]) -> List[dict] | None:
-        system = {
-            "role": "system",
-            "content":
-                "Extract a culture's Affiliation (single parent) and Kinships (3–10 peers) using Appadurai's scapes. "
-                "Use ONLY the provided known_cultures list. Do not invent unseen names. "
-                "Affiliation: hierarchical/hosting ('chapter of','under','member of','hosted by','fiscal sponsor','governed by'). "
-                "Return at most one affiliation; if multiple candidates appear, choose the strongest single parent. "
-                "Kinships: peer collaborations with evidence in ≥2 scapes (Ethno/Tech/Finance/Media/Ideo) or strong single scape (Finance or Tech with MoU). "
-                "Limit Mediascape-only links to ≤50%. If Affiliation chosen, do not include it in Kinships. "
-                "Return ONLY JSON: {\"items\": [{\"affiliation\": <name or null>, \"kinships\": [names...]}, ...]} (same order/length)."
-        }
+    def fit_batch_size(self, self_names: List[str], kin_col: List[str], aff_col: List[str], known_names: List[str]) -> int:
+        rows = (_json_dumps(self._payload_row(*r)) for r in zip(self_names, kin_col, aff_col))
+        return cap_batch_size(self.cfg.kinaff_bs, self.SYSTEM + _json_dumps({"known_cultures": known_names[:300]}),
+                              rows, self.cfg.max_prompt_tokens)
+
+    async def _request(self, rows: List[dict], known_names: List[str]) -> List[dict] | None:
         known = known_names[:300]
-        user = {"role":"user","content": json.dumps({"known_cultures": known, "input": rows}, ensure_ascii=False)}
-        resp = self.h.client.responses.create(model=self.cfg.model, input=[system, user], text={"verbosity":"low"})
-        text = _OpenAIHandle.parse_text(resp)
-        try:
-            items = json.loads(text).get("items", [])
-            return items if isinstance(items, list) else None
-        except Exception:
-            return None
+        return await self.h.request_items(self.cfg.model, self.SYSTEM, {"known_cultures": known}, rows,
+                                          parse=lambda text: _json_list(text, "items"), timeout=self.cfg.kinaff_timeout,
+                                          valid=self.valid)
+
+    @staticmethod
+    def valid(it) -> bool:
+        """A kin/affil item extract() can read: optional str/list affiliation, optional list of kinships."""
+        return (isinstance(it, dict) and isinstance(it.get("affiliation"), (str, list, type(None)))
+                and isinstance(it.get("kinships", []), list))
 
     # --------- helpers ----------
     # ADD inside LLMKinAff
     def _resolve_to_known(self, cand: str, known_names: List[str], min_sim: float = 0.68) -> Optional[str]:
         """Token-Jaccard fuzzy match LLM parent to a known culture name."""
-        if not isinstance(cand, str) or not cand.strip(): 
+        if not isinstance(cand, str) or not cand.strip():
             return None
-        def norm(s: str) -> List[str]:
-            s = re.sub(r"[^\w\s]", " ", s.lower())
-            return [t for t in re.split(r"\s+", s) if t]
-        base = set(norm(cand))
-        if not base: 
-            return None
-        best, best_sim = None, 0.0
-        for k in known_names:
-            ks = set(norm(k))
-            if not ks: 
-                continue
-            inter = len(base & ks); uni = len(base | ks)
-            sim = inter / uni if uni else 0.0
-            if sim > best_sim or (sim == best_sim and stable_hash_int(k) < stable_hash_int(best or "")):
-                best, best_sim = k, sim
-        return best if best_sim >= min_sim else None
+        return _known_index(tuple(known_names)).resolve(cand, min_sim)
 
 
     def _parse_parent_field(self, parent_field) -> List[str]:
         if parent_field is None: return []
         if isinstance(parent_field, list): return [p for p in parent_field if isinstance(p, str) and p.strip()]
         if isinstance(parent_field, str):
-            parts = re.split(r"\s*(?:[,;/]| and )\s*", parent_field)
+            parts = _PARENT_SPLIT_RE.split(parent_field)
             return [p.strip() for p in parts if p.strip()]
         return []
 
@@ -710,32 +1217,22 @@ class LLMKinAff:
 
     @staticmethod
     def _nearest_names(self_name: str, known: List[str], k: int) -> List[str]:
-        base = set(re.split(r"\s+", self_name.lower()))
-        def sim(n):
-            s = set(re.split(r"\s+", n.lower()))
-            inter = len(base & s); uni = len(base | s) or 1
-            return inter/uni
-        cand = [n for n in known if n and n != self_name]
-        cand.sort(key=lambda n: (sim(n), -stable_hash_int(n)), reverse=True)
-        return cand[:k]
+        return _known_index(tuple(known), _ws_tokens).nearest(self_name, k)
 
     @staticmethod
     def _extract_mentions(text: str, known: List[str]) -> List[str]:
-        t = (text or "").lower(); out=[]
-        for n in known:
-            if not n: continue
-            pat = re.escape(n.lower())
-            if re.search(rf"\b{pat}\b", t): out.append(n)
-        return out
+        """Known names occurring as whole words in text (case-insensitive), in `known` order."""
+        t = (text or "").lower()
+        if not t: return []
+        found = _mention_matcher(tuple(known)).found(t)
+        return [n for n in known if n and n.lower() in found] if found else []
 
     def _fallback_one(self, self_name: str, kin_text: str, aff_text: str, known: List[str]) -> dict:
-        known_wo_self = [n for n in known if n and n != self_name]
         parent = None
-        aff_cand = self._extract_mentions(aff_text, known_wo_self) + self._extract_mentions(kin_text, known_wo_self)
-        if aff_cand:
-            for n in aff_cand:
-                if re.search(self._PARENTS_RE, (kin_text+" "+aff_text).lower()): parent = n; break
-        kin_raw = self._extract_mentions(kin_text, known_wo_self)
+        # match against the shared `known` (one cached matcher for every row), then drop self
+        kin_raw = [n for n in self._extract_mentions(kin_text, known) if n != self_name]
+        aff_cand = [n for n in self._extract_mentions(aff_text, known) if n != self_name] + kin_raw
+        if aff_cand and self._PARENTS_RE.search((kin_text+" "+aff_text).lower()): parent = aff_cand[0]
         kin = [n for n in kin_raw if n != parent]
         if len(kin) < 3:
             pad = [n for n in self._nearest_names(self_name, known, 10) if n not in kin and n != parent]
@@ -743,16 +1240,18 @@ class LLMKinAff:
         if len(kin) > 10: kin = kin[:10]
         return {"affiliation": parent, "kinships": kin}
 
-    def extract(self, self_names: List[str], kin_col: List[str], aff_col: List[str],
-                known_names: List[str], name_to_scope: Dict[str, str]) -> List[dict]:
+    async def extract(self, self_names: List[str], kin_col: List[str], aff_col: List[str],
+                      known_names: List[str], name_to_scope: Dict[str, str]) -> List[dict]:
         rows = [self._payload_row(self_names[i], kin_col[i], aff_col[i]) for i in range(len(self_names))]
-        arr = self._request(rows, known_names)
+        arr = await self._request(rows, known_names)
         out: List[dict] = []
         if arr is None or len(arr) != len(rows):
             log("      ⚠️ kin/affil LLM failed or size mismatch; applying rule-based fallback for this batch.")
             for i in range(len(rows)):
                 out.append(self._fallback_one(self_names[i], kin_col[i], aff_col[i], known_names))
             return out
+        known_set = set(known_names)   # once per batch, shared by every row below
+        near = _known_index(tuple(known_names), _ws_tokens)
         for i, itm in enumerate(arr):
             self_name = self_names[i]
             parent_raw = itm.get("affiliation", None)
@@ -771,30 +1270,19 @@ class LLMKinAff:
             kin = itm.get("kinships", [])
             parent_list = self._parse_parent_field(parent_raw)
 
-            # ADD DEBUG (you can keep these or remove later)
-            if not parent_list:
-                log(f"      [affil] {self_name}: LLM returned no parent candidates")
-            elif parent is None:
-                reasons = []
-                for c in parent_list:
-                    if c not in known_set:
-                        reasons.append(f"{c}: not in known_set")
-                    elif not self._level_ok(self_name, c, name_to_scope):
-                        reasons.append(f"{c}: scope not higher")
-                    else:
-                        s = self._score_parent(c, kin_col[i], aff_col[i])
-                        reasons.append(f"{c}: low evidence score={s:.2f}")
-                log(f"      [affil] {self_name}: rejected → " + "; ".join(reasons))
-            else:
-                log(f"      [affil] {self_name}: accepted parent = {parent}")
-
-            known_set = set(known_names)
             parent = self._pick_affiliation(self_name, parent_list, kin_col[i], aff_col[i], known_set, name_to_scope, threshold=5.0)
-            kin = [x for x in kin if isinstance(x, str) and x in known_set and x != self_name]
-            kin = list(dict.fromkeys(kin))
-            kin = [x for x in kin if x != parent]
+            if KINAFF_DEBUG:   # KINAFF_DEBUG=1: explain each row's affiliation decision
+                if not parent_list:
+                    log(f"      [affil] {self_name}: LLM returned no parent candidates")
+                elif parent is None:
+                    reasons = [f"{c}: " + ("self" if c == self_name else "not in known_set" if c not in known_set else "scope not higher")
+                               for c in parent_list if c]
+                    log(f"      [affil] {self_name}: rejected → " + "; ".join(reasons))
+                else:
+                    log(f"      [affil] {self_name}: accepted parent = {parent}")
+            kin = list(dict.fromkeys(x for x in kin if isinstance(x, str) and x in known_set and x != self_name and x != parent))
             if len(kin) < 3:
-                pads = [n for n in self._nearest_names(self_name, known_names, 12) if n not in kin and n != parent]
+                pads = [n for n in near.nearest(self_name, 12) if n not in kin and n != parent]
                 kin.extend(pads[: (3 - len(kin)) ])
             if len(kin) > 10: kin = kin[:10]
             out.append({"affiliation": parent, "kinships": kin})
@@ -825,82 +1313,137 @@ class EnergyConfig:
             "recruitment_count": self.w_recruitment_count,
             "learning_hours": self.w_learning_hours,
         }
-
-def compute_energy_per_row(vec: Dict[str,float], opp: Dict[str,float], cfg: EnergyConfig) -> float:
-    E=0.0; w=cfg.weights()
-    for k,v in vec.items():
-        E += w.get(k,0.0) * float(v) * (1.0 + cfg.lam * float(opp.get(k,0.3)))
+    def weight_vector(self, keys: List[str]) -> np.ndarray:
+        w = self.weights()
+        return np.array([w.get(k, 0.0) for k in keys], dtype=np.float64)
+
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _energy_nb(A, O, W, lam):
+        n, K = A.shape; E = np.zeros(n)
+        for i in numba.prange(n):
+            acc = 0.0
+            for k in range(K): acc += W[k] * A[i, k] * (1.0 + lam * O[i, k])
+            E[i] = acc
+        return E
+
+NUMBA_MIN_ROWS = 5000
+
+def compute_energy(A: np.ndarray, O: np.ndarray, keys: List[str], cfg: EnergyConfig) -> np.ndarray:
+    """Row energies e_i = Σ_k w_k·a_ik·(1 + λ·o_ik) for (N, K) arrays; numba kernel above NUMBA_MIN_ROWS when installed."""
+    W = cfg.weight_vector(keys)
+    if numba is not None and len(A) > NUMBA_MIN_ROWS:
+        return _energy_nb(A, O, W, float(cfg.lam))
+    E = np.zeros(len(A))
+    for k in range(len(keys)):   # accumulate column by column: same summation order as the per-row loop
+        E += W[k] * A[:, k] * (1.0 + cfg.lam * O[:, k])
     return E
 
-def clamp_zscore(values: List[float], z_clip: float) -> List[float]:
-    if not values: return []
-    s = pd.Series(values)
-    z = (s - s.mean()) / (s.std(ddof=0) + 1e-9)
-    z = z.clip(lower=-z_clip, upper=z_clip)
+def clamp_zscore(values, z_clip: float) -> np.ndarray:
+    """Population z-score, clipped to ±z_clip, then min-max scaled to [0,1] (all 0.5 when flat)."""
+    x = np.asarray(values, dtype=np.float64)
+    if not x.size: return x
+    z = np.clip((x - x.mean()) / (x.std() + 1e-9), -z_clip, z_clip)
     mn, mx = z.min(), z.max()
-    if mx - mn < 1e-9: return [0.5]*len(values)
-    return ((z - mn) / (mx - mn)).tolist()
-
-def compute_viz_derivatives_from_energy(
-    name: str,
-    kinships_str: str,
-    openness: int,
-    normE: float,
+    if mx - mn < 1e-9: return np.full(x.shape, 0.5)
+    return (z - mn) / (mx - mn)
+
+VIZ_COLUMNS = ["KinshipsCount","Sides","InteriorParticleCount","ParticlesPerEdge","BorderParticleCount","TotalParticleCount"]
+
+def compute_viz_derivatives(
+    kinships_strs: Sequence[str],
+    openness: Sequence[int],
+    normE: Sequence[float],
     ecfg: EnergyConfig,
-) -> Dict[str, object]:
-    kinships_list = split_list_field(kinships_str)
-    kinships_count = len(kinships_list)
-    sides = max(3, kinships_count if kinships_count > 0 else 3)
-    interior = int(math.floor(ecfg.interior_min + normE * (ecfg.interior_max - ecfg.interior_min)))
-    particles_per_edge = ecfg.edge_base + math.floor((11 - int(openness)) * 0.5) + int(math.floor(normE * ecfg.edge_energy_boost))
-    border = sides * max(1, particles_per_edge)
-    total = interior + border
-    if total < ecfg.min_total_particles:
-        interior += (ecfg.min_total_particles - total)
-        total = interior + border
-    return {
-        "KinshipsCount": kinships_count,
-        "Sides": sides,
-        "InteriorParticleCount": interior,
-        "ParticlesPerEdge": particles_per_edge,
-        "BorderParticleCount": border,
-        "TotalParticleCount": total,
-    }
+) -> pd.DataFrame:
+    """Particle geometry for every row in one NumPy block; one VIZ_COLUMNS row per input row."""
+    kinships_count = split_list_field_series(pd.Series(list(kinships_strs), dtype=object)).str.len().to_numpy(np.int64)
+    open_ = np.asarray(openness, dtype=np.int64); e = np.asarray(normE, dtype=np.float64)
+    sides = np.maximum(3, np.where(kinships_count > 0, kinships_count, 3))
+    interior = np.floor(ecfg.interior_min + e * (ecfg.interior_max - ecfg.interior_min)).astype(np.int64)
+    particles_per_edge = ecfg.edge_base + np.floor((11 - open_) * 0.5).astype(np.int64) + np.floor(e * ecfg.edge_energy_boost).astype(np.int64)
+    border = sides * np.maximum(1, particles_per_edge)
+    interior = interior + np.maximum(0, ecfg.min_total_particles - (interior + border))
+    return pd.DataFrame(dict(zip(VIZ_COLUMNS, (kinships_count, sides, interior, particles_per_edge, border, interior + border))))
 
 # -------------------------------- Transform --------------------------------
-def process_dataframe(df_in: pd.DataFrame, overrides: Dict[str, Optional[str]]|None) -> pd.DataFrame:
+async def run_batched(fn: Callable[[int, int], Awaitable[object]], total: int, batch_size: int,
+                      label: str, start_ts: float, limit: Optional[int] = None) -> List[Tuple[int, int, object]]:
+    """Run fn(lo, hi) for every batch [lo, hi) of range(total) concurrently, at most `limit` batches at a time.
+    fn is only called once its batch gets a slot, so per-batch inputs can be built lazily inside it.
+
+    Returns (lo, hi, result) in batch order; a failed batch carries its exception as the result
+    so the caller can fall back for just those rows.
+    """
+    n_batches = max(1, math.ceil(total / max(1, batch_size)))
+    spans = [(int(c[0]), int(c[-1]) + 1) for c in np.array_split(np.arange(total), n_batches) if len(c)]  # even sizes
+    done = 0
+    sem = asyncio.Semaphore(limit or len(spans) or 1)
+    async def one(lo: int, hi: int):
+        nonlocal done
+        try:
+            async with sem: return await fn(lo, hi)
+        finally:
+            done += hi - lo
+            log_progress(label, done, total, start_ts)
+    results = await asyncio.gather(*(one(lo, hi) for lo, hi in spans), return_exceptions=True)
+    for r in results:
+        if isinstance(r, BaseException) and not isinstance(r, Exception): raise r
+    return [(lo, hi, r) for (lo, hi), r in zip(spans, results)]
+
+async def process_dataframe(df_in: pd.DataFrame, overrides: Dict[str, Optional[str]]|None,
+                            llm_cfg: Optional[LLMBaseConfig] = None) -> pd.DataFrame:
     overrides = overrides or {k: None for k in ALIASES}
+    llm_cfg = llm_cfg or LLMBaseConfig()
 
     # 1) pick base columns
-    name_raw = pick_series(df_in,"name",overrides.get("name"))
-    values_raw = pick_series(df_in,"values",overrides.get("values"))
-    kinships_text = pick_series(df_in,"kinships",overrides.get("kinships"))     # free text
-    kb_raw = pick_series(df_in,"knowledgebase",overrides.get("knowledgebase"))
-    open_raw = pick_series(df_in,"openness",overrides.get("openness"))
-    scope_free = pick_series(df_in,"scope",overrides.get("scope"))              # "Scope of Your Culture"
-    practices_raw = pick_series(df_in,"practices",overrides.get("practices"))
-    own_words = pick_series(df_in,"affiliations",overrides.get("affiliations")) # "Your Own Words" (aliased)
+    cols = column_map(df_in)
+    name_raw = pick_series(df_in,"name",overrides.get("name"),cols)
+    values_raw = pick_series(df_in,"values",overrides.get("values"),cols)
+    kinships_text = pick_series(df_in,"kinships",overrides.get("kinships"),cols)     # free text
+    kb_raw = pick_series(df_in,"knowledgebase",overrides.get("knowledgebase"),cols)
+    open_raw = pick_series(df_in,"openness",overrides.get("openness"),cols)
+    scope_free = pick_series(df_in,"scope",overrides.get("scope"),cols)              # "Scope of Your Culture"
+    practices_raw = pick_series(df_in,"practices",overrides.get("practices"),cols)
+    own_words = pick_series(df_in,"affiliations",overrides.get("affiliations"),cols) # "Your Own Words" (aliased)
+    # blank cells read as NaN/pd.NA; make them "" so they never stringify to "nan"/"<NA>" in prompts or evidence
+    name_raw, values_raw, kinships_text, scope_free, practices_raw, own_words = (
+        s.astype(object).where(s.notna(), "") for s in (name_raw, values_raw, kinships_text, scope_free, practices_raw, own_words))
 
     total = len(df_in)
     start_ts = time.time()
     log("[2/12] Initializing GPT-5 client…")
-    h = _OpenAIHandle()
-    llm_cfg = LLMBaseConfig(batch_size=8)
-
-    # 2) names
-    log("[3/12] Normalizing names…")
-    llm_names = LLMNames(llm_cfg, h)
+    h = _OpenAIHandle(llm_cfg.max_concurrency, llm_cfg.request_timeout, llm_cfg.request_retries, llm_cfg.use_cache)
+    schema_keys = LLMActionExtractor.ACTION_KEYS
+    numeric_actions = all(k in df_in.columns and f"opp_{k}" in df_in.columns for k in schema_keys)
+
+    # 2) names + scopes + actions + atmosphere, one combined request per batch
+    log("[3/12] Extracting names, scopes, actions + atmosphere (combined)…")
+    llm_names, llm_scopes = LLMNames(llm_cfg, h), LLMScopes(llm_cfg, h)
+    llm_actions, atm = LLMActionExtractor(llm_cfg, h), LLMAtmosphereExtractor(llm_cfg, h)
+    combined = LLMCombinedExtractor(llm_cfg, h, llm_names, llm_scopes, llm_actions, atm)
+    in_cols = (name_raw, scope_free, values_raw, practices_raw, own_words)
+    # identical input rows (template answers) are sent once and broadcast back through `inverse`
+    inverse, uniq = pd.factorize(pd.Series([tuple(map(str, t)) for t in zip(*in_cols)], dtype=object))
+    first = np.unique(inverse, return_index=True)[1]   # factorize codes follow first appearance
+    n_uniq = len(uniq)
+    if n_uniq < total: log(f"      {total - n_uniq} repeated row(s) share an earlier row's request")
+    def rows_in(lo: int, hi: int) -> List[dict]:   # built per batch, so only in-flight rows are held as dicts
+        pos = first[lo:hi]
+        return [{"name": str(n), "scope": str(sc), "values": str(v), "practices": str(p), "own_words": str(o)}
+                for n, sc, v, p, o in zip(*(c.iloc[pos] for c in in_cols))]
     norm_names: List[str] = []
-    batch, processed = [], 0
-    for i in range(total):
-        batch.append(str(name_raw.iloc[i]))
-        if len(batch) >= llm_cfg.batch_size:
-            norm_names.extend(llm_names.normalize(batch)); batch.clear()
-            processed = min(processed + llm_cfg.batch_size, total)
-            log_progress("      names processed", processed, total, start_ts)
-    if batch:
-        norm_names.extend(llm_names.normalize(batch))
-        log_progress("      names processed", total, total, start_ts)
+    llm_A: List[np.ndarray] = []; llm_O: List[np.ndarray] = []
+    traits_list: List[Tuple[float, float, float]] = []
+    bs = combined.fit_batch_size((r for lo in range(0, n_uniq, 256) for r in rows_in(lo, lo + 256)), not numeric_actions)
+    log(f"      {bs} row(s) per request")
+    for _, _, res in await run_batched(lambda lo, hi: combined.extract(rows_in(lo, hi), with_actions=not numeric_actions),
+                                       n_uniq, bs, "      rows processed", start_ts, llm_cfg.max_concurrency):
+        if isinstance(res, Exception): raise res
+        norm_names.extend(res["names"]); traits_list.extend(res["traits"])
+        if res["actions"] is not None: llm_A.append(res["actions"][0]); llm_O.append(res["actions"][1])
+    norm_names = [norm_names[c] for c in inverse]; traits_list = [traits_list[c] for c in inverse]
+    if llm_A: llm_A, llm_O = [np.vstack(llm_A)[inverse]], [np.vstack(llm_O)[inverse]]
 
     # 3) Dedupe by normalized Name (keep first)
     keep_idx, seen = [], set()
@@ -922,22 +1465,23 @@ def process_dataframe(df_in: pd.DataFrame, overrides: Dict[str, Optional[str]]|N
     practices_raw = _flt(practices_raw)
     own_words     = _flt(own_words)
     norm_names = [norm_names[i] for i in keep_idx]
+    traits_list = [traits_list[i] for i in keep_idx]
+    if llm_A: llm_A, llm_O = np.vstack(llm_A)[keep_idx], np.vstack(llm_O)[keep_idx]
+    else:     llm_A = llm_O = np.zeros((len(keep_idx), len(schema_keys)))
     total = len(norm_names)
 
-    # 4) scopes from multi-field evidence
+    # 4) scopes from multi-field evidence (already cached by the combined pass)
     log("[4/12] Deciding scopes…")
-    llm_scopes = LLMScopes(llm_cfg, h)
-    evidences = [
-        f"declared_scope: {str(scope_free.iloc[i])} | values_traits: {str(values_raw.iloc[i])} | own_words: {str(own_words.iloc[i])}"
-        for i in range(total)
-    ]
+    evidences = [_evidence_text(str(scope_free.iloc[i]), str(values_raw.iloc[i]), str(own_words.iloc[i]))
+                 for i in range(total)]
     try:
-        norm_scopes, scope_conf = llm_scopes.decide(evidences)
-        norm_scopes = rebalance_scopes(norm_scopes, scope_conf, evidences)
+        ev_rows = [RowText.of(ev) for ev in evidences]
+        norm_scopes, scope_conf = await llm_scopes.decide(ev_rows)
+        norm_scopes = rebalance_scopes(norm_scopes, scope_conf, ev_rows)
         name_to_scope = { norm_names[i]: norm_scopes[i] for i in range(total) }
     except Exception as e:
         log(f"      ⚠️ scopes LLM error; using rule-based: {e}")
-        norm_scopes = [normalize_scope_rule_based_4(ev) for ev in evidences]
+        norm_scopes = normalize_scope_series(pd.Series(evidences)).tolist()
         scope_conf  = [0.45] * total
         name_to_scope = { norm_names[i]: norm_scopes[i] for i in range(total) }
     dist = {k: norm_scopes.count(k) for k in ["global","national","regional","local"]}
@@ -946,95 +1490,58 @@ def process_dataframe(df_in: pd.DataFrame, overrides: Dict[str, Optional[str]]|N
 
     # 5) actions text (for estimation)
     log("[5/12] Collecting actions…")
-    schema_keys = LLMActionExtractor.ACTION_KEYS
-    num_cols = {k: df_in[k].iloc[keep_idx].fillna(0) for k in schema_keys if k in df_in.columns}
-    opp_cols = {k: df_in[f"opp_{k}"].iloc[keep_idx].fillna(0.5) for k in schema_keys if f"opp_{k}" in df_in.columns}
-    texts_for_actions = [f"values: {values_raw.iloc[i]} | practices: {practices_raw.iloc[i]} | own_words: {own_words.iloc[i]}"
-                         for i in range(total)]
+    def _num(col: str, fill: float) -> pd.Series:   # an all-blank Arrow column is null[pyarrow], which fillna rejects
+        return pd.to_numeric(df_in[col].iloc[keep_idx], errors="coerce").astype(np.float64).fillna(fill)
+    num_cols = {k: _num(k, 0.0) for k in schema_keys if k in df_in.columns}
+    opp_cols = {k: _num(f"opp_{k}", 0.5) for k in schema_keys if f"opp_{k}" in df_in.columns}
+    texts_for_actions = [_action_text(values_raw.iloc[i], practices_raw.iloc[i], own_words.iloc[i]) for i in range(total)]
     nonempty = sum(1 for t in texts_for_actions if isinstance(t, str) and t.strip())
     log(f"      action text non-empty: {nonempty}/{total}")
     if nonempty == 0:
         log("      ⚠️ All action texts are empty. Check column headers / overrides (--delimiter, --name, etc.).")
 
-    actions_list: List[dict] = []
-    if len(num_cols) == len(schema_keys) and len(opp_cols) == len(schema_keys):
-        for i in range(total):
-            actions = {k: float(num_cols[k].iloc[i] or 0) for k in schema_keys}
-            opp = {k: float(max(0,min(1, opp_cols[k].iloc[i] if k in opp_cols else 0.5))) for k in schema_keys}
-            if all(v == 0.0 for v in actions.values()) and not _has_negation(texts_for_actions[i]):
-                est_a, est_o = rule_based_estimate(texts_for_actions[i]); actions, opp = est_a, est_o
-            actions_list.append({"actions":actions,"opp":opp})
+    if numeric_actions:
+        A = np.column_stack([num_cols[k].to_numpy(dtype=np.float64, na_value=0.0) for k in schema_keys]).reshape(-1, len(schema_keys))
+        O = np.clip(np.column_stack([opp_cols[k].to_numpy(dtype=np.float64, na_value=0.5) if k in opp_cols else np.full(total, 0.5)
+                                     for k in schema_keys]), 0.0, 1.0).reshape(-1, len(schema_keys))
+        est = (A == 0.0).all(axis=1) & ~np.array([_has_negation(t) for t in texts_for_actions], dtype=bool)
+        if est.any():
+            A[est], O[est] = LLMActionExtractor.estimate([texts_for_actions[i] for i in np.flatnonzero(est)])
         log("      using numeric action overrides from CSV (with estimation safeguard)")
     else:
-        log("      extracting actions via GPT-5 (must estimate)…")
-        llm_actions = LLMActionExtractor(llm_cfg, h)
-        processed = 0
-        for i in range(0, total, llm_cfg.batch_size):
-            chunk = texts_for_actions[i:i+llm_cfg.batch_size]
-            try:
-                actions_list.extend(llm_actions.extract(chunk))
-            except Exception as e:
-                log(f"      ⚠️ actions LLM error rows {i+1}..{min(i+llm_cfg.batch_size,total)}: {e}")
-                for j,_ in enumerate(chunk):
-                    est_a, est_o = rule_based_estimate(chunk[j])
-                    actions_list.append({"actions": est_a, "opp": est_o})
-            processed = min(i+llm_cfg.batch_size, total)
-            log_progress("      actions processed", processed, total, start_ts)
+        log("      using GPT-5 action estimates from the combined pass")
+        A, O = llm_A, llm_O
 
     # 6) energy
     log("[6/12] Computing energy…")
     ecfg = EnergyConfig()
-    energies: List[float] = []
-    for i in range(total):
-        energies.append(compute_energy_per_row(actions_list[i]["actions"], actions_list[i]["opp"], ecfg))
-        if (i+1)%200==0 or (i+1)==total:
-            log_progress("      energy rows", i+1, total, start_ts)
-    if (max(energies) - min(energies)) < 1e-9:
+    energies = compute_energy(A, O, schema_keys, ecfg)
+    log_progress("      energy rows", total, total, start_ts)
+    if total and np.ptp(energies) < 1e-9:
         log("      ⚠️ All energies are identical → NormEnergy = 0.5 → Interior ≈ 140 for every row.")
     normE = clamp_zscore(energies, z_clip=ecfg.z_clip)
 
     # 7) Kinships + Affiliation (scapes) with scope-level check
     log("[7/12] Extracting kinships + affiliation (scapes)…")
     kin_aff = LLMKinAff(llm_cfg, h)
-    kin_texts = [str(kinships_text.iloc[i]) for i in range(total)]
-    aff_texts = [str(own_words.iloc[i]) for i in range(total)]  # rich text for parent cues
+    def kin_aff_texts(lo: int, hi: int) -> Tuple[List[str], List[str]]:   # per batch, like rows_in
+        return [str(x) for x in kinships_text.iloc[lo:hi]], [str(x) for x in own_words.iloc[lo:hi]]  # own words: parent cues
     kin_aff_results: List[dict] = []
-    for i in range(0, total, llm_cfg.batch_size):
-        chunk_self = norm_names[i:i+llm_cfg.batch_size]
-        chunk_kin  = kin_texts[i:i+llm_cfg.batch_size]
-        chunk_aff  = aff_texts[i:i+llm_cfg.batch_size]
-        try:
-            kin_aff_results.extend(kin_aff.extract(chunk_self, chunk_kin, chunk_aff, norm_names, name_to_scope))
-        except Exception as e:
-            log(f"      ⚠️ kin/affil LLM error rows {i+1}..{min(i+llm_cfg.batch_size,total)}: {e}")
-            for j in range(len(chunk_self)):
-                kin_aff_results.append(kin_aff._fallback_one(chunk_self[j], chunk_kin[j], chunk_aff[j], norm_names))
-        log_progress("      kin/affil processed", min(i+llm_cfg.batch_size,total), total, start_ts)
+    bs = kin_aff.fit_batch_size(norm_names, *kin_aff_texts(0, total), norm_names)
+    log(f"      {bs} row(s) per request")
+    for lo, hi, res in await run_batched(
+            lambda lo, hi: kin_aff.extract(norm_names[lo:hi], *kin_aff_texts(lo, hi), norm_names, name_to_scope),
+            total, bs, "      kin/affil processed", start_ts, llm_cfg.max_concurrency):
+        if isinstance(res, Exception):
+            log(f"      ⚠️ kin/affil LLM error rows {lo+1}..{hi}: {res}")
+            kin_texts, aff_texts = kin_aff_texts(lo, hi)
+            for j in range(lo, hi):
+                kin_aff_results.append(kin_aff._fallback_one(norm_names[j], kin_texts[j - lo], aff_texts[j - lo], norm_names))
+        else:
+            kin_aff_results.extend(res)
 
     # 8) Atmosphere → Color
-    log("[8/12] Deriving atmosphere traits and assigning colors…")
-    if "LLMAtmosphereExtractor" not in globals():
-        raise RuntimeError("Programmer error: LLMAtmosphereExtractor is not defined (check class order).")
-    def _is_openai_api_error(err: Exception) -> bool:
-        name = err.__class__.__name__
-        return name in {"APIError","APIStatusError","RateLimitError","APITimeoutError",
-                        "BadRequestError","AuthenticationError","InternalServerError"}
-    try:
-        atm = LLMAtmosphereExtractor(llm_cfg, h)
-        traits_list = atm.extract(
-            [str(values_raw.iloc[i]) for i in range(total)],
-            [str(practices_raw.iloc[i]) for i in range(total)],
-            [str(own_words.iloc[i]) for i in range(total)],
-        )
-    except Exception as e:
-        if _is_openai_api_error(e):
-            log(f"      ⚠️ atmosphere LLM API error, using fallback traits: {e}")
-            traits_list = fallback_traits(
-                [str(values_raw.iloc[i]) for i in range(total)],
-                [str(practices_raw.iloc[i]) for i in range(total)],
-            )
-        else:
-            raise
+    log("[8/12] Assigning colors from atmosphere traits…")
     color_hexes = assign_colors_divergent(
         [norm_names[i] for i in range(total)],
         traits_list,
@@ -1044,47 +1551,41 @@ def process_dataframe(df_in: pd.DataFrame, overrides: Dict[str, Optional[str]]|N
 
     # 9) build rows (+ diversify kinship count deterministically)
     log("[9/12] Building rows + particle counts…")
+    kb_vals = parse_int_1_10_series(kb_raw, default=5).tolist()
+    near = _known_index(tuple(norm_names), _ws_tokens)   # rows are the known list: pad by row index
+    open_vals = parse_int_1_10_series(open_raw, default=5).tolist()
+    # Diverse target kin count by energy + small hash jitter; near.hashes are stable_hash_int(norm_names)
+    jitter = ((near.hashes % 101) / 100.0 - 0.5) * 0.6   # [-0.3, +0.3]
+    target_Ns = np.clip(np.round(3 + 7 * np.clip(normE + jitter, 0.0, 1.0)), 3, 10).astype(np.int64).tolist()
     rows=[]
     for i in range(total):
         name_n = norm_names[i]
-        kb_n = parse_int_1_10(kb_raw.iloc[i], default=5)
-        open_n = parse_int_1_10(open_raw.iloc[i], default=5)
+        kb_n = kb_vals[i]
+        open_n = open_vals[i]
         aff_final = kin_aff_results[i].get("affiliation", None)
         kin_list  = kin_aff_results[i].get("kinships", [])
-        # Diverse target kin count by energy + small hash jitter
-        e = float(normE[i])
-        jitter = ((stable_hash_int(name_n) % 101) / 100.0 - 0.5) * 0.6   # [-0.3, +0.3]
-        target_N = int(round(3 + 7 * max(0.0, min(1.0, e + jitter))))
-        target_N = max(3, min(10, target_N))
+        target_N = target_Ns[i]
         if len(kin_list) > target_N:
             kin_list = sorted(kin_list, key=lambda x: (stable_hash_int(name_n + "→" + x)))[:target_N]
         elif len(kin_list) < 3:
-            pads = LLMKinAff._nearest_names(name_n, norm_names, 12)
+            pads = near.nearest_at(i, 12)
             kin_list.extend([p for p in pads if p not in kin_list and p != aff_final][: (3 - len(kin_list)) ])
-        kin_csv = ", ".join(kin_list)
-        viz = compute_viz_derivatives_from_energy(name_n, kin_csv, open_n, normE[i], ecfg)
         row = {
             "Name": name_n,
-            "Kinships": kin_csv,
+            "Kinships": ", ".join(kin_list),
             "Affiliation": (aff_final or ""),
             "Knowledgebase": kb_n,
             "Openness": open_n,
             "Scope": norm_scopes[i],
-            "Sides": viz["Sides"],
-            "InteriorParticleCount": viz["InteriorParticleCount"],
-            "ParticlesPerEdge": viz["ParticlesPerEdge"],
-            "BorderParticleCount": viz["BorderParticleCount"],
-            "TotalParticleCount": viz["TotalParticleCount"],
-            "Color": color_hexes[i],
         }
         rows.append(row)
         if (i+1)%200==0 or (i+1)==total:
             log_progress("      rows built", i+1, total, start_ts)
 
-    df_out = pd.DataFrame(rows, columns=[
-        "Name","Kinships","Affiliation","Knowledgebase","Openness","Scope",
-        "Sides","InteriorParticleCount","ParticlesPerEdge","BorderParticleCount","TotalParticleCount","Color",
-    ])
+    df_out = pd.DataFrame(rows, columns=["Name","Kinships","Affiliation","Knowledgebase","Openness","Scope"])
+    viz = compute_viz_derivatives(df_out["Kinships"].tolist(), open_vals, normE, ecfg)
+    df_out = pd.concat([df_out, viz[VIZ_COLUMNS[1:]]], axis=1)
+    df_out["Color"] = color_hexes
 
     log("[10/12] Verifying counts…")
     assert all(df_out["Sides"] >= 3), "Sides must be ≥3"
@@ -1094,11 +1595,18 @@ def process_dataframe(df_in: pd.DataFrame, overrides: Dict[str, Optional[str]]|N
     return df_out
 
 # ----------------------------------- I/O -----------------------------------
+def _read_csv(path: Path, **kw) -> pd.DataFrame:
+    """Arrow's multithreaded reader with Arrow-backed strings when pyarrow is installed; pandas' C parser otherwise."""
+    try:
+        return pd.read_csv(path, engine="pyarrow", dtype_backend="pyarrow", **kw)
+    except Exception:   # pyarrow missing, or an input/option the Arrow engine rejects
+        return pd.read_csv(path, **kw)
+
 def read_dataframe(path: Path, *, delimiter: Optional[str], has_header: bool) -> pd.DataFrame:
     if delimiter is None:
-        try:    return pd.read_csv(path, header=0 if has_header else None)
-        except Exception: return pd.read_csv(path, sep="\t", header=0 if has_header else None)
-    return pd.read_csv(path, sep=delimiter, header=0 if has_header else None)
+        try:    return _read_csv(path, header=0 if has_header else None)
+        except Exception: return _read_csv(path, sep="\t", header=0 if has_header else None)
+    return _read_csv(path, sep=delimiter, header=0 if has_header else None)
 
 def write_dataframe(df: pd.DataFrame, path: Path) -> None:
     df.to_csv(path, index=False)
@@ -1111,11 +1619,16 @@ def build_argparser() -> argparse.ArgumentParser:
     p.add_argument("--delimiter", dest="delimiter", default=None, help=", | ; | \\t | custom")
     p.add_argument("--no-header", dest="no_header", action="store_true", help="CSV has no header row")
     p.add_argument("--name", dest="name", help="Header name for Name column (optional)")
+    p.add_argument("--concurrency", dest="concurrency", type=int, default=LLMBaseConfig.max_concurrency,
+                   help="Max concurrent LLM requests (default: %(default)s)")
+    p.add_argument("--no-cache", dest="no_cache", action="store_true",
+                   help=f"Ignore and don't write the LLM reply cache ({LLM_CACHE_DIR}/)")
     return p
 
 def main(argv: Optional[Iterable[str]] = None) -> int:
     ap = build_argparser()
     args = ap.parse_args(argv)
+    if args.concurrency < 1: ap.error("--concurrency must be >= 1")
     in_path, out_path = Path(args.in_path), Path(args.out_path)
     has_header = not args.no_header
     t0 = time.time()
@@ -1123,7 +1636,8 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
     if not in_path.exists(): ap.error(f"Input file not found: {in_path}")
     df_in = read_dataframe(in_path, delimiter=args.delimiter, has_header=has_header)
     log(f"      Loaded {len(df_in)} row(s)")
-    df_out = process_dataframe(df_in, overrides={"name": args.name})
+    llm_cfg = LLMBaseConfig(max_concurrency=args.concurrency, use_cache=not args.no_cache)
+    df_out = asyncio.run(process_dataframe(df_in, overrides={"name": args.name}, llm_cfg=llm_cfg))
     log("[12/12] Writing output CSV…")
     write_dataframe(df_out, out_path)
     log(f"✅ Done in {time.time()-t0:.2f}s. Wrote: {out_path}")